@@ -1,6 +1,7 @@
 import math
 import os
 
+import numpy as np
 import pandas as pd
 
 from pyspfc.config.fileconfig import get_file_names
@@ -30,8 +31,19 @@ class CSVimport:
         self.network_settings = None
         self.grid_lines = list()
         self.grid_nodes = list()
+        self.generators = list()
+        self.loads = list()
         self.time_stamp_keys = list()
 
+        # vectorized time series tables, see create_series_tables()
+        self.series_time_stamps = list()
+        self.gen_P_ts = None
+        self.gen_Q_ts = None
+        self.load_P_ts = None
+        self.load_Q_ts = None
+        self.gen_to_node = None
+        self.load_to_node = None
+
     def import_csv_files(self):
         """
         - main method to import all csv files from 'csv_import' folder
@@ -42,6 +54,7 @@ class CSVimport:
         self.network_settings = self.get_settings()
         self.get_lines()
         self.get_nodes()
+        self.create_series_tables()
         self.check_consistency()
         self.get_time_stamp_keys()
 
@@ -62,20 +75,49 @@ class CSVimport:
         method creates a list of time stamp keys
         :return:
         """
-        time_stamp_keys = None
-        for grid_node in self.grid_nodes:
-            if len(grid_node.generators):
-                generator = next((x for x in grid_node.generators if len(x.series_data)), None)
-                time_stamp_keys = generator.series_data
-                break
-            elif len(grid_node.loads):
-                load = next((x for x in grid_node.loads if len(x.series_data)), None)
-                time_stamp_keys = load.series_data
-                break
-
-        for key in time_stamp_keys:
+        for key in self.series_time_stamps:
             self.time_stamp_keys.append(key)
 
+    def create_series_tables(self):
+        """
+        builds vectorized time series tables from the imported series dataframes: one
+        (T, E) numpy array per table (T = number of time stamps, E = number of elements)
+        plus the owner node index of every element column, so the series values can be
+        aggregated per node with array operations instead of per-timestamp dict lookups
+        :return: none
+        """
+        gen_p_series_df = self.df_import[file_names['generators_p_series']]
+        gen_q_series_df = self.df_import[file_names['generators_q_series']]
+        load_p_series_df = self.df_import[file_names['loads_p_series']]
+        load_q_series_df = self.df_import[file_names['loads_q_series']]
+
+        # global time stamp list in order of first occurrence over all series files
+        for series_df in (gen_p_series_df, gen_q_series_df, load_p_series_df, load_q_series_df):
+            for time_stamp in series_df['time_stamp']:
+                if time_stamp not in self.series_time_stamps:
+                    self.series_time_stamps.append(time_stamp)
+
+        generator_names = [generator.name for generator in self.generators]
+        load_names = [load.name for load in self.loads]
+
+        self.gen_P_ts = self.create_series_table(gen_p_series_df, generator_names)
+        self.gen_Q_ts = self.create_series_table(gen_q_series_df, generator_names)
+        self.load_P_ts = self.create_series_table(load_p_series_df, load_names)
+        self.load_Q_ts = self.create_series_table(load_q_series_df, load_names)
+
+        node_indices = {grid_node.name: index for index, grid_node in enumerate(self.grid_nodes)}
+        self.gen_to_node = np.array([node_indices[generator.node] for generator in self.generators], dtype=int)
+        self.load_to_node = np.array([node_indices[load.node] for load in self.loads], dtype=int)
+
+    def create_series_table(self, series_df, element_names):
+        """
+        converts one series dataframe into a (T, E) numpy array aligned to the global
+        time stamp list, missing entries become zero
+        :return: numpy array of shape (number of time stamps, number of elements)
+        """
+        aligned_df = series_df.set_index('time_stamp').reindex(self.series_time_stamps)
+        return aligned_df[element_names].fillna(0).to_numpy(dtype=float)
+
     def get_loads(self):
         """
         creates a list of loads
@@ -180,12 +222,12 @@ class CSVimport:
             grid_node = GridNode(grid_node_name)
             self.grid_nodes.append(grid_node)
 
-        generators = self.get_generators()
-        loads = self.get_loads()
+        self.generators = self.get_generators()
+        self.loads = self.get_loads()
 
         for grid_node in self.grid_nodes:
-            grid_node.set_generators([generator for generator in generators if generator.node == grid_node.name])
-            grid_node.set_loads([load for load in loads if load.node == grid_node.name])
+            grid_node.set_generators([generator for generator in self.generators if generator.node == grid_node.name])
+            grid_node.set_loads([load for load in self.loads if load.node == grid_node.name])
 
     def get_lines(self):
         """
@@ -1,6 +1,9 @@
+import multiprocessing
 import os
 
-from pyspfc.csvexport import CSVexport, TIMESTAMP
+import numpy as np
+
+from pyspfc.csvexport import CSVexport
 from pyspfc.csvimport import CSVimport
 from pyspfc.directories import reset_root_path
 from pyspfc.electrical_schematic import create_network_schematic
@@ -9,11 +12,55 @@ from pyspfc.export_results_to_pdf import create_pdf_report
 from pyspfc.gridelements.busadmittancematrix import BusAdmittanceMatrix
 from pyspfc.gridelements.gridline import GridLine
 from pyspfc.gridelements.gridnode import GridNode
+from pyspfc.powerflow.fastdecoupled import FastDecoupledPowerFlow
 from pyspfc.powerflow.jacobianmatrix import JacobianMatrix
 from pyspfc.powerflow.powerflow import PowerFlow
 from pyspfc.powerflow.powerflowreporter import LoadFlowReporter
 
 
+# per-process state of the parallel powerflow workers, initialized by _init_powerflow_worker()
+_powerflow_worker_state = dict()
+
+
+def _init_powerflow_worker(v_nom, s_nom, bus_admittance_matrix, grid_line_list, transformer_list,
+                           precision='fp64'):
+    """
+    pool initializer, keeps the time invariant grid data in the worker process
+    :return: void
+    """
+    _powerflow_worker_state.clear()
+    _powerflow_worker_state.update(v_nom=v_nom, s_nom=s_nom, bus_admittance_matrix=bus_admittance_matrix,
+                                   grid_line_list=grid_line_list, transformer_list=transformer_list,
+                                   precision=precision, jacobi_matrix=None, powerflow=None)
+
+
+def _solve_powerflow_timestamp(task):
+    """
+    solves the powerflow of a single timestamp inside a worker process, reusing the
+    worker local Jacobian and PowerFlow objects like the serial sweep does
+    :param task: tuple of (timestamp, gridnodes, voltagenodes)
+    :return: tuple of (timestamp, gridnode results, gridline results)
+    """
+    timestamp, gridnodes, voltagenodes = task
+    state = _powerflow_worker_state
+
+    if state['jacobi_matrix'] is None:
+        state['jacobi_matrix'] = JacobianMatrix(gridnodes=gridnodes, voltagenodes=voltagenodes,
+                                                bus_admittance_matrix=state['bus_admittance_matrix'])
+        state['powerflow'] = PowerFlow(v_nom=state['v_nom'], s_nom=state['s_nom'],
+                                       bus_admittance_matrix=state['bus_admittance_matrix'],
+                                       jacobimatrix=state['jacobi_matrix'], gridnodes=gridnodes,
+                                       gridlines=state['grid_line_list'], transformers=state['transformer_list'],
+                                       precision=state['precision'])
+    else:
+        state['jacobi_matrix'].set_operating_point(gridnodes, voltagenodes)
+        state['powerflow'].set_operating_point(gridnodes)
+
+    gridnode_results, gridline_results = state['powerflow'].do_powerflow()
+
+    return timestamp, gridnode_results, gridline_results
+
+
 class Grid:
     """
     the main class to perform imports of network data and performing power flow calculations
@@ -40,6 +87,22 @@ class Grid:
 
         self.timestamps = None
 
+        # cached per-node aggregates of the imported time series, see __cache_powerflow_data()
+        self.__timestamp_indices = None
+        self.__gen_P = None
+        self.__gen_Q = None
+        self.__load_P = None
+        self.__load_Q = None
+        self.__p_max = None
+        self.__p_min = None
+        self.__q_max = None
+        self.__q_min = None
+        self.__is_slack = None
+        self.__typenumbers = None
+
+        # reusable GridNode lists of prepare_data_for_powerflow(), keyed by node type pattern
+        self.__gridnode_buffer = None
+
         self.gridnode_results = dict()
         self.gridline_results = dict()
 
@@ -74,8 +137,67 @@ class Grid:
         self.__grid_line_list = csv_import.grid_lines
         self.__settings = csv_import.network_settings
         self.timestamps = csv_import.time_stamp_keys
+        self.__cache_powerflow_data(csv_import)
         self.create_bus_admittance_matrix()
 
+    def __cache_powerflow_data(self, csv_import):
+        """
+        aggregates the imported time series tables once per import into (T, N) numpy
+        matrices (T = number of timestamps, N = number of grid nodes), so that
+        prepare_data_for_powerflow() only has to slice a single row per timestamp;
+        the (T, E) element tables of the import are scattered onto their owner nodes
+        with one accumulation per table
+        :param csv_import: CSVimport object holding the vectorized series tables
+        :return: void
+        """
+        number_of_timestamps = len(self.timestamps)
+        number_of_nodes = len(self.__grid_node_list)
+        self.__timestamp_indices = {timestamp: index for index, timestamp in enumerate(self.timestamps)}
+
+        self.__gen_P = np.zeros(shape=(number_of_timestamps, number_of_nodes), dtype=float)
+        self.__gen_Q = np.zeros(shape=(number_of_timestamps, number_of_nodes), dtype=float)
+        self.__load_P = np.zeros(shape=(number_of_timestamps, number_of_nodes), dtype=float)
+        self.__load_Q = np.zeros(shape=(number_of_timestamps, number_of_nodes), dtype=float)
+
+        if len(csv_import.gen_to_node):
+            np.add.at(self.__gen_P.T, csv_import.gen_to_node, csv_import.gen_P_ts.T)
+            np.add.at(self.__gen_Q.T, csv_import.gen_to_node, csv_import.gen_Q_ts.T)
+        if len(csv_import.load_to_node):
+            np.add.at(self.__load_P.T, csv_import.load_to_node, csv_import.load_P_ts.T)
+            np.add.at(self.__load_Q.T, csv_import.load_to_node, csv_import.load_Q_ts.T)
+
+        # static per-node sums of the generator limits
+        generator_limits = np.array([(generator.p_max, generator.p_min, generator.q_max, generator.q_min)
+                                     for generator in csv_import.generators], dtype=float)
+        generator_limits = generator_limits.reshape(-1, 4)
+        self.__p_max = np.bincount(csv_import.gen_to_node, weights=generator_limits[:, 0],
+                                   minlength=number_of_nodes)
+        self.__p_min = np.bincount(csv_import.gen_to_node, weights=generator_limits[:, 1],
+                                   minlength=number_of_nodes)
+        self.__q_max = np.bincount(csv_import.gen_to_node, weights=generator_limits[:, 2],
+                                   minlength=number_of_nodes)
+        self.__q_min = np.bincount(csv_import.gen_to_node, weights=generator_limits[:, 3],
+                                   minlength=number_of_nodes)
+
+        self.__is_slack = np.array([grid_node.name == self.__settings.slack
+                                    for grid_node in self.__grid_node_list], dtype=bool)
+
+        # grid node type numbers are identical for all GridNode objects
+        reference_node = self.__grid_node_list[0]
+        self.__typenumbers = {node_type: reference_node.get_grid_node_type_index_of(node_type)
+                              for node_type in ('slack', 'PV', 'PQ')}
+
+        # per-unit conversion is independent of the timestamp, so it is applied once to the
+        # whole (T, N) matrices and the static limit sums instead of per prepared timestamp
+        s_nom = 1 if self.__settings.is_import_pu else self.__settings.s_nom
+        self.__gen_P_pu = self.__gen_P / s_nom
+        self.__load_P_pu = self.__load_P / s_nom
+        self.__load_Q_pu = self.__load_Q / s_nom
+        self.__p_max_pu = self.__p_max / s_nom
+        self.__p_min_pu = self.__p_min / s_nom
+        self.__q_max_pu = self.__q_max / s_nom
+        self.__q_min_pu = self.__q_min / s_nom
+
     def create_bus_admittance_matrix(self):
         """
         instantiation of a BusAdmittanceMatrix object
@@ -84,20 +206,24 @@ class Grid:
 
         settings = self.__settings
 
-        if not settings.is_resistance_pu:
+        if not settings.is_resistance_pu and len(self.__grid_line_list):
             # reference admittance value
             y_nom = (settings.s_nom / settings.v_nom ** 2)
 
-            for index, gridline in enumerate(self.__grid_line_list):
-                admittance = gridline.get_admittance()
-                real_part_pu = admittance.get_real_part() / y_nom
-                imag_part_pu = admittance.get_imaginary_part() / y_nom
-                self.__grid_line_list[index].set_admittance(real_part_pu, imag_part_pu)
-
-                transverse_admittance = gridline.get_transverse_admittance_on_node()
-                real_part_pu = transverse_admittance.get_real_part() / y_nom
-                imag_part_pu = transverse_admittance.get_imaginary_part() / y_nom
-                self.__grid_line_list[index].set_transverse_admittance(real_part_pu, imag_part_pu)
+            # gather all line admittances once and convert them to per-unit in a
+            # single vectorized divide instead of per-line accessor arithmetic
+            admittances = np.array([(gridline.get_admittance().get_real_part(),
+                                     gridline.get_admittance().get_imaginary_part(),
+                                     gridline.get_transverse_admittance_on_node().get_real_part(),
+                                     gridline.get_transverse_admittance_on_node().get_imaginary_part())
+                                    for gridline in self.__grid_line_list], dtype=float)
+            admittances_pu = admittances / y_nom
+
+            # scatter the per-unit values back to the line objects
+            for gridline, (real_part_pu, imag_part_pu, transverse_real_pu, transverse_imag_pu) in zip(
+                    self.__grid_line_list, admittances_pu):
+                gridline.set_admittance(real_part_pu, imag_part_pu)
+                gridline.set_transverse_admittance(transverse_real_pu, transverse_imag_pu)
 
         # Instanzierung der BusAdmittanceMatrix-Klasse
         self.bus_admittance_matrix = BusAdmittanceMatrix(self.__grid_node_list, self.__grid_line_list,
@@ -145,22 +271,20 @@ class Grid:
         console output of grid node elements
         :return: void
         """
-        if not len(self.__grid_node_list):
+        if not self.__grid_node_list:
             print("\nKeine Knoten in Liste")
         else:
-            for i in range(0, len(self.__grid_node_list)):
-                print(self.__grid_node_list[i])
+            print("\n".join(map(str, self.__grid_node_list)))
 
     def print_grid_line_list(self):
         """
         console output of grid line elements
         :return: void
         """
-        if not len(self.__grid_line_list):
+        if not self.__grid_line_list:
             print("\nKeine Leitungen in Liste")
         else:
-            for i in range(0, len(self.__grid_line_list)):
-                print(self.__grid_line_list[i])
+            print("\n".join(map(str, self.__grid_line_list)))
 
     def get_bus_admittance_matrix(self):
         """
@@ -177,91 +301,172 @@ class Grid:
         return self.__bus_admittance_matrix.calc_inverse()
 
     # perform powerflow using newton-raphson algorithm
-    def do_powerflow(self):
+    def do_powerflow(self, method='newton', processes=1, precision='fp64'):
         """
         method calls the do_powerflow() method of the PowerFlow class after preparing grid data for power flow calculation
+        :param method: 'newton' for the full Newton-Raphson algorithm (default) or 'fdpf' for the
+                       fast decoupled power flow, which reuses two constant factorizations over all
+                       iterations and timestamps
+        :param processes: number of worker processes for the Newton-Raphson timestamp sweep,
+                          timestamps are independent of each other and are distributed over a
+                          multiprocessing pool if processes > 1
+        :param precision: 'fp64' (default) or 'fp32' for single precision LU back-solves of the
+                          Newton-Raphson steps; the mismatch computation and the convergence
+                          check always stay in double precision
         :return: void
         """
-        for timestamp in self.timestamps:
-            gridnodes, voltagenodes = self.prepare_data_for_powerflow(timestamp=timestamp)
+        if method == 'fdpf':
+            self.do_fast_decoupled_powerflow()
+            return
 
-            self.jacobi_matrix = JacobianMatrix(gridnodes=gridnodes, voltagenodes=voltagenodes,
-                                                bus_admittance_matrix=self.bus_admittance_matrix.matrix)
+        if processes > 1:
+            self.__do_powerflow_parallel(processes, precision)
+            return
 
-            self.powerflow = PowerFlow(v_nom=self.__settings.v_nom, s_nom=self.__settings.s_nom,
-                                       bus_admittance_matrix=self.bus_admittance_matrix.matrix,
-                                       jacobimatrix=self.jacobi_matrix, gridnodes=gridnodes,
-                                       gridlines=self.__grid_line_list, transformers=self.__transformer_list)
+        # pre-size the result dictionaries with all timestamp keys
+        self.gridnode_results = dict.fromkeys(self.timestamps)
+        self.gridline_results = dict.fromkeys(self.timestamps)
+
+        # converged voltages of the previous timestamp, used as warm start for the next one
+        previous_Fk_Ek_vector = None
+
+        for timestamp in self.timestamps:
+            gridnodes, voltagenodes = self.prepare_data_for_powerflow(timestamp=timestamp, reuse=True)
+
+            # Jacobian and PowerFlow objects are built once and afterwards only updated with the
+            # operating point of the next timestamp, the topology is time invariant
+            if self.jacobi_matrix is None:
+                self.jacobi_matrix = JacobianMatrix(gridnodes=gridnodes, voltagenodes=voltagenodes,
+                                                    bus_admittance_matrix=self.bus_admittance_matrix.matrix)
+
+                self.powerflow = PowerFlow(v_nom=self.__settings.v_nom, s_nom=self.__settings.s_nom,
+                                           bus_admittance_matrix=self.bus_admittance_matrix.matrix,
+                                           jacobimatrix=self.jacobi_matrix, gridnodes=gridnodes,
+                                           gridlines=self.__grid_line_list, transformers=self.__transformer_list,
+                                           precision=precision)
+            else:
+                # warm start: consecutive timestamps usually have near-identical operating
+                # points, frequently the mismatch is already below tolerance and the
+                # Newton-Raphson loop exits without a single iteration
+                self.jacobi_matrix.set_operating_point(gridnodes, voltagenodes,
+                                                       Fk_Ek_vector=previous_Fk_Ek_vector)
+                self.powerflow.set_operating_point(gridnodes)
 
             self.gridnode_results[timestamp], self.gridline_results[timestamp] = self.powerflow.do_powerflow()
+            previous_Fk_Ek_vector = self.powerflow.converged_Fk_Ek_vector
+
+    def __do_powerflow_parallel(self, processes, precision='fp64'):
+        """
+        distributes the per-timestamp Newton-Raphson solves over a multiprocessing pool;
+        every worker holds its own Jacobian/PowerFlow pair and reuses it for all timestamps
+        it processes
+        :param processes: number of worker processes
+        :param precision: 'fp64' or 'fp32', see do_powerflow()
+        :return: void
+        """
+        self.gridnode_results = dict.fromkeys(self.timestamps)
+        self.gridline_results = dict.fromkeys(self.timestamps)
+
+        tasks = [(timestamp,) + self.prepare_data_for_powerflow(timestamp=timestamp)
+                 for timestamp in self.timestamps]
+
+        initargs = (self.__settings.v_nom, self.__settings.s_nom, self.bus_admittance_matrix.matrix,
+                    self.__grid_line_list, self.__transformer_list, precision)
+
+        with multiprocessing.Pool(processes=processes, initializer=_init_powerflow_worker,
+                                  initargs=initargs) as pool:
+            for timestamp, gridnode_results, gridline_results in pool.map(_solve_powerflow_timestamp, tasks):
+                self.gridnode_results[timestamp] = gridnode_results
+                self.gridline_results[timestamp] = gridline_results
+
+    def do_fast_decoupled_powerflow(self):
+        """
+        performs the time-series sweep with the fast decoupled power flow; the B' and B''
+        factorizations are cached inside the FastDecoupledPowerFlow object and all
+        timestamps are solved together as the columns of one batched voltage state
+        :return: void
+        """
+        fdpf = FastDecoupledPowerFlow(v_nom=self.__settings.v_nom, s_nom=self.__settings.s_nom,
+                                      bus_admittance_matrix=self.bus_admittance_matrix.matrix,
+                                      gridlines=self.__grid_line_list)
+        self.powerflow = fdpf
 
-    def prepare_data_for_powerflow(self, timestamp):
+        self.gridnode_results = dict.fromkeys(self.timestamps)
+        self.gridline_results = dict.fromkeys(self.timestamps)
+
+        gridnodes_of_timestamps = {timestamp: self.prepare_data_for_powerflow(timestamp=timestamp)[0]
+                                   for timestamp in self.timestamps}
+        gridnode_results, gridline_results = fdpf.do_powerflow_batch(gridnodes_of_timestamps)
+
+        for timestamp in self.timestamps:
+            self.gridnode_results[timestamp] = gridnode_results[timestamp]
+            self.gridline_results[timestamp] = gridline_results[timestamp]
+
+    def prepare_data_for_powerflow(self, timestamp, reuse=False):
         """
         Method prepares time variant data to perform power flow calculation of a single timestamp
+        :param timestamp: timestamp to prepare
+        :param reuse: if True and the node type pattern is unchanged, the GridNode objects of
+                      the previous call are updated in place instead of allocating T x N fresh
+                      objects over a sweep; only safe when the caller no longer references the
+                      previously returned lists
         :return: list of grid nodes and list voltage nodes for power flow calculation
         """
 
-        settings = self.__settings
-        v_nom, s_nom = (1, 1) if settings.is_import_pu else (settings.v_nom, settings.s_nom)
+        # per-node rows of the cached per-unit (T, N) matrices for the requested timestamp
+        row = self.__timestamp_indices[timestamp]
+        p_gen = self.__gen_P[row]
+        p_gen_pu = self.__gen_P_pu[row]
+        p_load_pu = self.__load_P_pu[row]
+        q_load_pu = self.__load_Q_pu[row]
+
+        p_max_pu = self.__p_max_pu
+        p_min_pu = self.__p_min_pu
+        q_max_pu = self.__q_max_pu
+        q_min_pu = self.__q_min_pu
+
+        # the node type pattern only depends on the slack choice and on which nodes feed in
+        type_signature = (p_gen != 0).tobytes()
+
+        if reuse and self.__gridnode_buffer is not None and self.__gridnode_buffer[0] == type_signature:
+            type_signature, gridnodes, voltagenodes = self.__gridnode_buffer
+            for index, gridnode in enumerate(gridnodes):
+                if self.__is_slack[index]:
+                    gridnode.update_time_variant_values(p_load=p_load_pu[index], q_load=q_load_pu[index])
+                elif p_gen[index]:
+                    gridnode.update_time_variant_values(p_gen=p_gen_pu[index], p_load=p_load_pu[index],
+                                                        q_load=q_load_pu[index])
+                else:
+                    gridnode.update_time_variant_values(p_gen=0, q_gen=0, p_load=p_load_pu[index],
+                                                        q_load=q_load_pu[index])
+            return gridnodes, voltagenodes
 
         gridnodes = list()
         voltagenodes = list()
-        for gridnode in self.__grid_node_list:
-            sum_of_p_max = 0
-            sum_of_p_min = 0
-            sum_of_q_max = 0
-            sum_of_q_min = 0
-            sum_of_active_power_gen = 0
-            sum_of_reactive_power_gen = 0
-            sum_of_active_power_load = 0
-            sum_of_reactive_power_load = 0
-            if len(gridnode.generators):
-                for generator in gridnode.generators:
-                    sum_of_p_max += generator.p_max
-                    sum_of_p_min += generator.p_min
-                    sum_of_q_max += generator.q_max
-                    sum_of_q_min += generator.q_min
-                    sum_of_active_power_gen += generator.series_data[timestamp]['P']
-                    sum_of_reactive_power_gen += generator.series_data[timestamp]['Q']
-            if len(gridnode.loads):
-                for load in gridnode.loads:
-                    sum_of_active_power_load += load.series_data[timestamp]['P']
-                    sum_of_reactive_power_load += load.series_data[timestamp]['Q']
-
-            p_load_pu = sum_of_active_power_load / s_nom
-            q_load_pu = sum_of_reactive_power_load / s_nom
-
+        for index, gridnode in enumerate(self.__grid_node_list):
             # transform to slack node
-            if gridnode.name == settings.slack:
-                v_mag_pu = 1.0
-                v_angle = 0.0
-                p_max_pu = sum_of_p_max / s_nom
-                p_min_pu = sum_of_p_min / s_nom
-                typenumber = gridnode.get_grid_node_type_index_of('slack')
-                gridnode = GridNode(gridnode.name, v_mag=v_mag_pu, v_angle=v_angle, p_load=p_load_pu, q_load=q_load_pu,
-                                    typenumber=typenumber, p_max=p_max_pu, p_min=p_min_pu)
+            if self.__is_slack[index]:
+                gridnode = GridNode(gridnode.name, v_mag=1.0, v_angle=0.0, p_load=p_load_pu[index],
+                                    q_load=q_load_pu[index], typenumber=self.__typenumbers['slack'],
+                                    p_max=p_max_pu[index], p_min=p_min_pu[index])
                 gridnodes.append(gridnode)
                 voltagenodes.append(gridnode)
             # transform to a PV node
-            elif sum_of_active_power_gen:
-                v_mag_pu = v_nom / v_nom
-                p_gen_pu = sum_of_active_power_gen / s_nom
-                p_max_pu = sum_of_p_max / s_nom
-                p_min_pu = sum_of_p_min / s_nom
-                q_max_pu = sum_of_q_max / s_nom
-                q_min_pu = sum_of_q_min / s_nom
-                typenumber = gridnode.get_grid_node_type_index_of('PV')
-                gridnode = GridNode(gridnode.name, p_gen=p_gen_pu, v_mag=v_mag_pu, p_load=p_load_pu, q_load=q_load_pu,
-                                    p_min=p_min_pu, p_max=p_max_pu, q_min=q_min_pu, q_max=q_max_pu,
-                                    typenumber=typenumber)
+            elif p_gen[index]:
+                gridnode = GridNode(gridnode.name, p_gen=p_gen_pu[index], v_mag=1.0, p_load=p_load_pu[index],
+                                    q_load=q_load_pu[index], p_min=p_min_pu[index], p_max=p_max_pu[index],
+                                    q_min=q_min_pu[index], q_max=q_max_pu[index],
+                                    typenumber=self.__typenumbers['PV'])
                 gridnodes.append(gridnode)
                 voltagenodes.append(gridnode)
             # transform to a PQ node
             else:
-                gridnode = GridNode(gridnode.name, p_gen=0, q_gen=0, p_load=p_load_pu, q_load=q_load_pu,
-                                    typenumber=gridnode.get_grid_node_type_index_of('PQ'))
+                gridnode = GridNode(gridnode.name, p_gen=0, q_gen=0, p_load=p_load_pu[index],
+                                    q_load=q_load_pu[index], typenumber=self.__typenumbers['PQ'])
                 gridnodes.append(gridnode)
 
+        self.__gridnode_buffer = (type_signature, gridnodes, voltagenodes)
+
         return gridnodes, voltagenodes
 
     def export_powerflow_results(self):
@@ -300,24 +505,26 @@ class Grid:
         Method prints busadmittance matrix in console
         :return: void
         """
-        result = ""
-        matrix = self.bus_admittance_matrix.matrix
-        n = len(matrix)
-        for i in range(0, n):
-            for j in range(0, n):
-                element = matrix[i][j]
-                if element.get_real_part() == 0 and element.get_imaginary_part() == 0:
-                    result += "{0:^50}".format("0")
-                elif element.get_imaginary_part() < 0:
-                    result += "{0:^50}".format(
-                        str(element.get_real_part()) + " - j(" + str(element.get_imaginary_part() * -1) + ")")
-                else:
-                    result += "{0:^50}".format(
-                        str(element.get_real_part()) + " + j(" + str(element.get_imaginary_part()) + ")")
+        matrix = self.bus_admittance_matrix.matrix.tocoo()
+        n = matrix.shape[0]
 
-            result += "\n"
+        # nur die besetzten Elemente formatieren (O(nnz) statt O(N^2)), das Vorzeichen
+        # des Imaginaerteils per Maske; alle unbesetzten Elemente bleiben "0"
+        # + 0.0 normalisiert negative Nullen aus den gespeicherten -Yij Werten
+        real_parts = matrix.data.real + 0.0
+        imag_parts = matrix.data.imag + 0.0
+        real_strings = np.char.mod("%s", real_parts)
+        positive = np.char.add(real_strings, np.char.mod(" + j(%s)", imag_parts))
+        negative = np.char.add(real_strings, np.char.mod(" - j(%s)", imag_parts * -1))
+        formatted = np.where(imag_parts < 0, negative, positive)
+        formatted[(real_parts == 0) & (imag_parts == 0)] = "0"
+
+        cells = np.full(shape=(n, n), fill_value="0", dtype=formatted.dtype)
+        cells[matrix.row, matrix.col] = formatted
+
+        result = "\n".join("".join(row) for row in np.char.center(cells, 50))
         print("")
-        print(result)
+        print(result + "\n")
 
     def create_pdf_report(self):
         """
@@ -337,26 +544,14 @@ class Grid:
         :return:
         """
 
-        min_voltage = 1e20
-        max_voltage = 0
-        min_worstcase_timestamp = 0
-        max_worstcase_timestamp = 0
+        # (T, N) matrix of all node voltage magnitudes, worst cases via argmin/argmax
+        v_magnitudes = np.array([[node_results['v_magnitude']
+                                  for node_results in self.gridnode_results[timestamp].values()
+                                  if 'v_magnitude' in node_results]
+                                 for timestamp in self.timestamps])
 
-        v_mag = {TIMESTAMP: list()}
-        for timestamp in self.timestamps:
-            v_mag[TIMESTAMP].append(timestamp)
-            timestamp_data = self.gridnode_results[timestamp]
-            for key, value in timestamp_data.items():
-                if key not in v_mag:
-                    if 'v_magnitude' in value:
-                        temp_min_voltage = value['v_magnitude']
-                        temp_max_voltage = value['v_magnitude']
-                        if temp_min_voltage < min_voltage:
-                            min_voltage = temp_min_voltage
-                            min_worstcase_timestamp = timestamp
-                        if temp_max_voltage > max_voltage:
-                            max_voltage = temp_max_voltage
-                            max_worstcase_timestamp = timestamp
+        min_worstcase_timestamp = self.timestamps[int(np.argmin(np.min(v_magnitudes, axis=1)))]
+        max_worstcase_timestamp = self.timestamps[int(np.argmax(np.max(v_magnitudes, axis=1)))]
 
         min_worstcase = 'min'
         max_worstcase = 'max'
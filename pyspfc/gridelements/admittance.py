@@ -1,25 +1,20 @@
-from pyspfc.utils import calculate_complex_reciprocal, get_complex_magnitude
+import numpy as np
 
 
 class Admittance:
 
     def __init__(self, impedance=None, g=0, b=0):
 
-        # Realteil der Admittanz
+        # Die Admittanz wird als einzelner nativer komplexer Wert gehalten
+        # Y = G + jB
         # X = Re{Z}
         # Y = Im{Z}
         # G = X / (X^2 + Y^2)
-        self.__g = None
-
-        # Imaginaerteil der Admittanz
-        # X = Re{Z}
-        # Y = Im{Z}
         # B = -Y / (X^2 + Y^2)
-        self.__b = None
+        self.__value = np.complex128(0)
 
         if impedance is None:
-            self.__g = g
-            self.__b = b
+            self.__value = np.complex128(complex(g or 0, b or 0))
 
         elif impedance.get_real_part() or impedance.get_imaginary_part():
             # g und b der Admittanz berechnen
@@ -27,83 +22,54 @@ class Admittance:
 
     # getter-Methoden
     def get_real_part(self):
-        return self.__g
+        return self.__value.real
 
     def get_imaginary_part(self):
-        return self.__b
+        return self.__value.imag
+
+    def __get_value(self):
+        return self.__value
+
+    # komplexer Wert der Admittanz als np.complex128
+    value = property(__get_value)
 
     # setter-Methoden
     def set_real_part(self, g):
-        self.__g = g
+        self.__value = np.complex128(complex(g or 0, self.__value.imag))
 
     def set_imaginary_part(self, b):
-        self.__b = b
+        self.__value = np.complex128(complex(self.__value.real, b or 0))
 
     # Methode berechnet die Konduktanz sowie die Suszeptanz
     def calc_admittance_from_impedance(self, impedance):
-        admittance = calculate_complex_reciprocal(impedance.get_real_part(), impedance.get_imaginary_part())
-
-        self.__g = admittance["real"]
-        self.__b = admittance["imaginary"]
+        impedance_value = complex(impedance.get_real_part() or 0, impedance.get_imaginary_part() or 0)
+        self.__value = np.complex128(1 / impedance_value)
 
     # Methode gibt den Betrag der Admittanz wieder
     def get_magnitude(self):
-        return get_complex_magnitude(self.__g, self.__b)
+        return float(np.absolute(self.__value))
 
     # (Operatorenueberladung) Methode addiert aus einem übergebenen Admittance-Objekte deren Werte auf die eigenen Werte
     # Methode ueberschreibt den "+" Operator fuer die Klasse Admittance
     def __add__(self, admittance_obj):
-
-        a = self.__g if self.__g is not None else 0
-        b = self.__b if self.__b is not None else 0
-        c = admittance_obj.get_real_part() if admittance_obj.get_real_part() is not None else 0
-        d = admittance_obj.get_imaginary_part() if admittance_obj.get_imaginary_part() is not None else 0
-
-        self.__g = a + c
-        self.__b = b + d
-
+        self.__value = self.__value + admittance_obj.value
         return self
 
     # (Operatorenueberladung) Methode subtrahiert aus einem übergebenen Admittance-Objekte deren Werte von den eigenen Werten
     # Methode ueberschreibt den "-" Operator fuer die Klasse Admittance
     def __sub__(self, admittance_obj):
-        a = self.__g if self.__g is not None else 0
-        b = self.__b if self.__b is not None else 0
-        c = admittance_obj.get_real_part() if admittance_obj.get_real_part() is not None else 0
-        d = admittance_obj.get_imaginary_part() if admittance_obj.get_imaginary_part() is not None else 0
-
-        self.__g = a - c
-        self.__b = b - d
-
+        self.__value = self.__value - admittance_obj.value
         return self
 
     # (Operatorenueberladung) Methode multipliziert aus einem übergebenen Admittance-Objekte deren Werte mit den eigenen Werten
     def __mul__(self, factor_obj):
-
-        a = self.__g if self.__g is not None else 0
-        b = self.__b if self.__b is not None else 0
-
         if type(factor_obj) == Admittance:
-            c = factor_obj.get_real_part() if factor_obj.get_real_part() is not None else 0
-            d = factor_obj.get_imaginary_part() if factor_obj.get_imaginary_part() is not None else 0
-
-            self.__g = a * c - b * d
-            self.__b = a * d + b * c
-
+            self.__value = self.__value * factor_obj.value
         else:
-            self.__g = a * factor_obj
-            self.__b = b * factor_obj
-
+            self.__value = self.__value * factor_obj
         return self
 
     # (Operatorenueberladung) Methode dividiert aus einem übergebenen Admittance-Objekte deren Werte mit den eigenen Werten
     def __truediv__(self, admittance_obj):
-        a = self.__g if self.__g is not None else 0
-        b = self.__b if self.__b is not None else 0
-        c = admittance_obj.get_real_part() if admittance_obj.get_real_part() is not None else 0
-        d = admittance_obj.get_imaginary_part() if admittance_obj.get_imaginary_part() is not None else 0
-
-        self.__g = (a * c + b * d) / (c ** 2 + d ** 2)
-        self.__b = (c * b - a * d) / (c ** 2 + d ** 2)
-
+        self.__value = self.__value / admittance_obj.value
         return self
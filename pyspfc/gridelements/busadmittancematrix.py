@@ -1,116 +1,88 @@
-import copy
-
 import numpy as np
+from scipy.sparse import coo_matrix
 
-from pyspfc.gridelements.admittance import Admittance
 from pyspfc.gridelements.gridline import GridLine
 
 
+def admittance_to_complex(admittance):
+	"""
+	converts an Admittance object to a native complex value, missing parts count as zero
+	:param admittance: Admittance object or None
+	:return: np.complex128 value of the admittance
+	"""
+	if admittance is None:
+		return np.complex128(0)
+	real_part = admittance.get_real_part() or 0
+	imaginary_part = admittance.get_imaginary_part() or 0
+	return np.complex128(complex(real_part, imaginary_part))
+
+
 # Klasse fuer die Erstellung der Knotenadmittanzmatrix
 class BusAdmittanceMatrix:
-	
+	"""
+	Die Knotenadmittanzmatrix wird als scipy.sparse CSR-Matrix (dtype=np.complex128) gehalten.
+	Fuer die Lastflussberechnung ist sie stark besetzt mit Nullen (nur durch Leitungen verbundene
+	Knotenpaare (i,j) sind ungleich null), daher reduziert die CSR-Speicherung den Speicherbedarf
+	von O(N^2) auf O(nnz) und erlaubt sparse Matrix-Vektor-Operationen.
+
+	Quelle: E. Handschin, Elektrische Energieübertragungssysteme. Teil 1: Stationaerer Betriebszustand.
+	Heidelberg: Hueting, 1983, Seite 51
+	"""
+
 	# Initialisierungskonstruktor
 	def __init__(self, grid_node_list, grid_line_list, transformer_list):
 		self.matrix = None
-		
+
 		# Gridlineliste (Leitungsliste)
 		self.__bus_connecter_list = grid_line_list + transformer_list
-		
+
 		# Transformator-Liste
 		self.__transformer_list = transformer_list
-		
+
 		self.calc_matrix(grid_node_list)
-	
-	def __get_sum_of_grid_lines_on_node(self, node_name_i, node_name_j):
-		"""
-		Methode zur Aufsummierung aller Admittanzen an einem Knoten
-		Parameter:
-		Knotennamen,
-		[Optional] Modus: True|False (all_admittances), Wenn True: werden alle Laengs- und Queradmittanzen aufsummiert.
-		Wenn False: werden nur die Längsadmittanzen aufsummiert (Queradmittanzen werden igoniert)
-		Rückgabewert: kummulierter Admittanzenwert
-		Quelle: E. Handschin, Elektrische Energieübertragungssysteme. Teil 1: Stationaerer Betriebszustand.
-		Heidelberg: Hueting, 1983, Seite 51
-		:param node_name_i:
-		:param node_name_j:
-		:return:
-		"""
-		
-		# Summenadmittanz an Knoten i und entspricht einem Element der Knotenadmittanzmatrix (KAM)
-		sum_admittance = Admittance(g=0, b=0)
-		
-		# Ist Diagonalelement ?
-		is_diag_elem = node_name_i == node_name_j
-		
-		for bus_connecter in self.__bus_connecter_list:
-			
-			# pruefen ob das Objekt eine Leitung ist
-			is_line = isinstance(bus_connecter, GridLine)
-			
-			if is_line:
-				# echte Kopien der Längs- und Queradmittanz erzeugen
-				bus_connecter_admittance = copy.deepcopy(bus_connecter.get_admittance()) if bus_connecter else 0
-				bus_connecter_transverse_admittance = copy.deepcopy(
-					bus_connecter.get_transverse_admittance_on_node()) if bus_connecter else 0
-			
-			else:
-				# echte Kopie der Kurzschlussimpedanz des Transformators erstellen
-				bus_connecter_admittance = copy.deepcopy(bus_connecter.get_sc_admittance()) if bus_connecter else 0
-				bus_connecter_transverse_admittance = None
-			# SPÄTER DIE SHUNT IMPEDANZ HINZUFUEGEN
-			# bus_connecter_transverse_admittance = copy.deepcopy(
-			# 	bus_connecter.get_transverse_admittance_on_node()) if bus_connecter else 0
-			
-			# pruefen ob Leitung beide Knoten verbindet
-			is_element_connecting_i_j = bus_connecter.get_node_name_i() == node_name_i and \
-			                            bus_connecter.get_node_name_j() == node_name_j or \
-			                            bus_connecter.get_node_name_i() == node_name_j and \
-			                            bus_connecter.get_node_name_j() == node_name_i
-			
-			# Prüfen ob Diagonalelement
-			if is_diag_elem:
-				# Addiere Längsadmittanz von Gridline zur Summenadmittanz
-				sum_admittance += bus_connecter_admittance
-				# Prüfen ob Queradmittanz in Gridline vorhanden
-				if bus_connecter_transverse_admittance:
-					# Addiere Knoten-Queradmittanz von Gridline zur Summenadmittanz
-					sum_admittance += bus_connecter_transverse_admittance
-			else:
-				if is_element_connecting_i_j:
-					# Addiere Längsadmittanz von Gridline zur Summenadmittanz
-					sum_admittance += bus_connecter_admittance
-		
-		return sum_admittance if is_diag_elem else sum_admittance * -1
-	
+
 	# Methode zur Erstellung der Knotenpunkt-Admittanz Matrix
 	def calc_matrix(self, grid_node_list):
-		
+
 		# quadratische Matrixdimension: nxn
 		number_of_grid_nodes = len(grid_node_list)
-		
-		# Erstellung eines nxn-dimensionalen Numpy-Arrays
-		self.matrix = np.ndarray(shape=(number_of_grid_nodes, number_of_grid_nodes), dtype=object)
-		
-		# urspruengliche, ungefilterte Liste kopieren
-		bus_connecter_list = copy.deepcopy(self.__bus_connecter_list)
-		
-		for row, grid_node in enumerate(grid_node_list):
-			
-			# Setzen der gefilterten Leitungsliste
-			bus_connecter_list_with_node_name = [bus_connecter for bus_connecter in bus_connecter_list if
-			                                     bus_connecter.get_node_name_i() == grid_node.name or
-			                                     bus_connecter.get_node_name_j() == grid_node.name]
-			
-			self.__bus_connecter_list = copy.deepcopy(bus_connecter_list_with_node_name)
-			
-			for column in range(row, number_of_grid_nodes):
-				gridnode_name_j = grid_node_list[column].name
-				
-				self.matrix[row][column] = self.matrix[column][row] = self.__get_sum_of_grid_lines_on_node(
-					grid_node.name, gridnode_name_j)
-	
+
+		node_indices = {grid_node.name: index for index, grid_node in enumerate(grid_node_list)}
+
+		# Index- und Admittanzspalten aller knotenverbindenden Elemente als Arrays aufbauen
+		indices_i = np.array([node_indices[bus_connecter.get_node_name_i()]
+		                      for bus_connecter in self.__bus_connecter_list], dtype=int)
+		indices_j = np.array([node_indices[bus_connecter.get_node_name_j()]
+		                      for bus_connecter in self.__bus_connecter_list], dtype=int)
+
+		admittances = np.array([admittance_to_complex(bus_connecter.get_admittance()
+		                                              if isinstance(bus_connecter, GridLine)
+		                                              else bus_connecter.get_sc_admittance())
+		                        for bus_connecter in self.__bus_connecter_list], dtype=np.complex128)
+
+		# Knoten-Queradmittanzen, nur Leitungen tragen hier bei
+		# SPÄTER DIE SHUNT IMPEDANZ DER TRANSFORMATOREN HINZUFUEGEN
+		transverse_admittances = np.array([admittance_to_complex(bus_connecter.get_transverse_admittance_on_node())
+		                                   if isinstance(bus_connecter, GridLine) else 0
+		                                   for bus_connecter in self.__bus_connecter_list], dtype=np.complex128)
+
+		# COO-Triplets in einem Rutsch zusammensetzen:
+		# Diagonalelemente (i,i) und (j,j): Summe der Laengs- und Queradmittanzen am Knoten,
+		# Nicht-Diagonalelemente (i,j) und (j,i): negative Laengsadmittanz zwischen den Knoten.
+		# Doppelte Eintraege werden beim Konvertieren nach CSR aufsummiert.
+		diagonal_values = admittances + transverse_admittances
+		rows = np.concatenate((indices_i, indices_j, indices_i, indices_j))
+		columns = np.concatenate((indices_i, indices_j, indices_j, indices_i))
+		values = np.concatenate((diagonal_values, diagonal_values, -admittances, -admittances))
+
+		self.matrix = coo_matrix((values, (rows, columns)),
+		                         shape=(number_of_grid_nodes, number_of_grid_nodes),
+		                         dtype=np.complex128).tocsr()
+
 	# Methode ermoeglicht das manuelle setzen einzelner Admittanz elemente
 	def set_element(self, row, column, admittance):
-		self.matrix[row][column] = admittance
+		matrix = self.matrix.tolil()
+		matrix[row, column] = admittance
 		if row != column:
-			self.matrix[column][row] = self.matrix[row][column]
+			matrix[column, row] = matrix[row, column]
+		self.matrix = matrix.tocsr()
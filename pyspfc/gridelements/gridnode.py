@@ -144,6 +144,22 @@ class GridNode:
     def set_loads(self, loads):
         self.__loads = loads
 
+    # aktualisiert die zeitvarianten Knotengroessen, damit dasselbe Knotenobjekt ueber
+    # mehrere Zeitschritte wiederverwendet werden kann statt je Zeitschritt neu zu allozieren
+    def update_time_variant_values(self, **kwargs):
+        if 'p_load' in kwargs:
+            self.__p_load = kwargs['p_load']
+        if 'q_load' in kwargs:
+            self.__q_load = kwargs['q_load']
+        if 'p_gen' in kwargs:
+            self.__p_gen = kwargs['p_gen']
+        if 'q_gen' in kwargs:
+            self.__q_gen = kwargs['q_gen']
+        if 'v_mag' in kwargs:
+            self.__node_voltage = kwargs['v_mag']
+        if 'v_angle' in kwargs:
+            self.__theta = kwargs['v_angle']
+
     name = property(__get_name)
     generators = property(__get_generators)
     loads = property(__get_loads)
@@ -1,51 +1,55 @@
+import numpy as np
+
+
 class Impedance:
 	# Parameter: r -> Realteil, x -> Imaginärteil, in_serie -> sind Real- und Imaginärteil in serie oder parallel [default: in serie]
 	def __init__(self, r, x, in_series=True, admittance=None):
-		
-		self.__r = None
-		self.__x = None
-		
+
+		# Die Impedanz wird als einzelner nativer komplexer Wert gehalten: Z = R + jX
+		self.__value = np.complex128(0)
+
 		if admittance:
 			self.calc_impedance_from_admittance(admittance)
-			
+
 		elif in_series:
-			# Realteil der Impedanz
-			self.__r = r
-			# Imaginaerteil der Impedanz
-			self.__x = x
+			self.__value = np.complex128(complex(r or 0, x or 0))
 		else:
 			if not r and x:
-				self.__x = x
-			
+				self.__value = np.complex128(complex(0, x))
+
 			if r and not x:
-				self.__r = r
-			
+				self.__value = np.complex128(complex(r, 0))
+
 			if r and x:
-				# Realteil der Impedanz
-				self.__r = (r * (x ** 2)) / (r ** 2 + x ** 2)
-				# Imaginaerteil der Impedanz
-				self.__x = ((r ** 2) * x) / (r ** 2 + x ** 2)
-	
+				# Real- und Imaginaerteil der Parallelschaltung
+				real_part = (r * (x ** 2)) / (r ** 2 + x ** 2)
+				imaginary_part = ((r ** 2) * x) / (r ** 2 + x ** 2)
+				self.__value = np.complex128(complex(real_part, imaginary_part))
+
 	# getter-Methoden
 	def get_real_part(self):
-		return self.__r
-	
+		return self.__value.real
+
 	def get_imaginary_part(self):
-		return self.__x
-	
+		return self.__value.imag
+
+	def __get_value(self):
+		return self.__value
+
+	# komplexer Wert der Impedanz als np.complex128
+	value = property(__get_value)
+
 	# setter-Methoden
 	def set_real_part(self, r):
-		self.__r = r
-	
+		self.__value = np.complex128(complex(r or 0, self.__value.imag))
+
 	def set_imaginary_part(self, x):
-		self.__x = x
-	
+		self.__value = np.complex128(complex(self.__value.real, x or 0))
+
 	def get_magnitude(self):
-		return get_complex_magnitude(self.__r, self.__x)
-	
-	# Methode berechnet die Konduktanz sowie die Suszeptanz
+		return float(np.absolute(self.__value))
+
+	# Methode berechnet die Impedanz aus der Admittanz
 	def calc_impedance_from_admittance(self, admittance):
-		impedance = calculate_complex_reciprocal(admittance.get_real_part(), admittance.get_imaginary_part())
-		
-		self.__r = impedance["real"]
-		self.__x = impedance["imaginary"]
+		admittance_value = complex(admittance.get_real_part() or 0, admittance.get_imaginary_part() or 0)
+		self.__value = np.complex128(1 / admittance_value)
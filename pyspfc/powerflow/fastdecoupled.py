@@ -0,0 +1,339 @@
+import math
+
+import numpy as np
+
+from .powerflow import factorize
+from .powerflowequations import calculate_line_flows, create_line_arrays
+
+"""
+Fast Decoupled Power Flow (FDPF) nach Stott/Alsac.
+
+Die Iterationsmatrizen B' (PQ u. PV Knoten) und B'' (nur PQ Knoten) werden aus dem
+Imaginaerteil der Knotenadmittanzmatrix gebildet und sind vom Betriebspunkt unabhaengig.
+Ihre LU-Zerlegungen werden deshalb nur einmal berechnet und ueber alle Iterationen und
+alle Zeitschritte wiederverwendet - ein Newton-Schritt reduziert sich damit auf zwei
+Rueckwaertseinsetzungen.
+"""
+
+
+class FastDecoupledPowerFlow:
+
+	def __init__(self, **kwargs):
+
+		self.v_nom = kwargs['v_nom'] if 'v_nom' in kwargs else None
+		self.s_nom = kwargs['s_nom'] if 's_nom' in kwargs else None
+
+		# Liste der Leitungen
+		self.grid_line_list = kwargs['gridlines'] if 'gridlines' in kwargs else None
+
+		# Knotenadmittanzmatrix (scipy.sparse CSR, komplex)
+		self.bus_admittance_matrix = kwargs['bus_admittance_matrix'] if 'bus_admittance_matrix' in kwargs else None
+
+		# LU-Zerlegungen von B' und B'', gecached je Knotentyp-Muster
+		self.__factorization_cache = dict()
+
+		# SoA-Spalten der Leitungsliste, werden beim ersten Zeitschritt aufgebaut
+		self.__line_arrays = None
+
+		self.iterations = 0
+
+		self.MAX_ITERATIONS = 30
+		self.CONVERGENCE_ACCURACY = 1e-6
+
+	def do_powerflow(self, gridnodes):
+		"""
+		performs a fast decoupled power flow calculation for a single timestamp;
+		reactive power limits of the PV nodes are not enforced on this path
+		:param gridnodes: prepared grid node list of the timestamp
+		:return: grid node results and grid line results of the timestamp
+		"""
+
+		number_of_nodes = len(gridnodes)
+
+		typenumbers = np.array([grid_node.get_type_number() for grid_node in gridnodes])
+		index_of_slack = int(np.where(typenumbers == 1)[0][0])
+		pq_indices = np.where(typenumbers == 2)[0]
+		pvpq_indices = np.where(typenumbers != 1)[0]
+
+		# spezifizierte Knotenleistungen in pu
+		p_spec = np.zeros(shape=number_of_nodes, dtype=float)
+		q_spec = np.zeros(shape=number_of_nodes, dtype=float)
+		for index, grid_node in enumerate(gridnodes):
+			if typenumbers[index] == 3:
+				p_spec[index] = grid_node.get_p_gen() - grid_node.get_p_load()
+			elif typenumbers[index] == 2:
+				p_spec[index] = -1 * grid_node.get_p_load()
+				q_spec[index] = -1 * grid_node.get_q_load()
+
+		# Spannungsstartwerte (flat start, Slack- und PV-Betraege sind vorgegeben)
+		v_magnitude = np.ones(shape=number_of_nodes, dtype=float)
+		v_angle = np.zeros(shape=number_of_nodes, dtype=float)
+		for index, grid_node in enumerate(gridnodes):
+			if grid_node.get_node_voltage_magnitude() is not None:
+				v_magnitude[index] = grid_node.get_node_voltage_magnitude()
+			if grid_node.get_node_voltage_angle_in_rad() is not None:
+				v_angle[index] = grid_node.get_node_voltage_angle_in_rad()
+
+		splu_Bp, splu_Bpp = self.__get_factorizations(pvpq_indices, pq_indices)
+
+		v_magnitude, v_angle, self.iterations = self.do_iterations(v_magnitude, v_angle, p_spec, q_spec,
+		                                                           pvpq_indices, pq_indices, splu_Bp, splu_Bpp)
+
+		return self.create_results(gridnodes, typenumbers, v_magnitude, v_angle, index_of_slack)
+
+	def do_powerflow_batch(self, gridnodes_of_timestamps):
+		"""
+		performs the fast decoupled power flow for all timestamps at once; timestamps with
+		the same node type pattern share their factorizations and their voltage states form
+		the columns of one (N, T) matrix, so every half iteration is a single sparse
+		matrix-matrix product and one back-substitution with a multi-column right-hand side
+		:param gridnodes_of_timestamps: dict of the prepared grid node lists per timestamp
+		:return: dicts of the grid node results and grid line results per timestamp
+		"""
+		grid_node_results_of_timestamps = dict()
+		grid_line_results_of_timestamps = dict()
+
+		# Zeitschritte nach Knotentyp-Muster gruppieren, innerhalb einer Gruppe sind die
+		# Iterationsmatrizen identisch und die Rueckwaertseinsetzungen werden gestapelt
+		timestamp_groups = dict()
+		for timestamp, gridnodes in gridnodes_of_timestamps.items():
+			type_pattern = tuple(grid_node.get_type_number() for grid_node in gridnodes)
+			timestamp_groups.setdefault(type_pattern, list()).append(timestamp)
+
+		# ueber alle Gruppen wird die groesste Iterationszahl gemeldet
+		self.iterations = 0
+
+		for type_pattern, timestamps in timestamp_groups.items():
+			typenumbers = np.array(type_pattern)
+			index_of_slack = int(np.where(typenumbers == 1)[0][0])
+			pq_indices = np.where(typenumbers == 2)[0]
+			pvpq_indices = np.where(typenumbers != 1)[0]
+
+			number_of_nodes = len(typenumbers)
+			number_of_timestamps = len(timestamps)
+
+			# spezifizierte Knotenleistungen und Spannungsstartwerte spaltenweise je Zeitschritt
+			p_spec = np.zeros(shape=(number_of_nodes, number_of_timestamps), dtype=float)
+			q_spec = np.zeros(shape=(number_of_nodes, number_of_timestamps), dtype=float)
+			v_magnitude = np.ones(shape=(number_of_nodes, number_of_timestamps), dtype=float)
+			v_angle = np.zeros(shape=(number_of_nodes, number_of_timestamps), dtype=float)
+
+			for column, timestamp in enumerate(timestamps):
+				for index, grid_node in enumerate(gridnodes_of_timestamps[timestamp]):
+					if typenumbers[index] == 3:
+						p_spec[index, column] = grid_node.get_p_gen() - grid_node.get_p_load()
+					elif typenumbers[index] == 2:
+						p_spec[index, column] = -1 * grid_node.get_p_load()
+						q_spec[index, column] = -1 * grid_node.get_q_load()
+					if grid_node.get_node_voltage_magnitude() is not None:
+						v_magnitude[index, column] = grid_node.get_node_voltage_magnitude()
+					if grid_node.get_node_voltage_angle_in_rad() is not None:
+						v_angle[index, column] = grid_node.get_node_voltage_angle_in_rad()
+
+			splu_Bp, splu_Bpp = self.__get_factorizations(pvpq_indices, pq_indices)
+
+			v_magnitude, v_angle, group_iterations = self.do_iterations_batch(v_magnitude, v_angle, p_spec, q_spec,
+			                                                                  pvpq_indices, pq_indices,
+			                                                                  splu_Bp, splu_Bpp)
+			self.iterations = max(self.iterations, group_iterations)
+
+			for column, timestamp in enumerate(timestamps):
+				node_results, line_results = self.create_results(gridnodes_of_timestamps[timestamp], typenumbers,
+				                                                 v_magnitude[:, column], v_angle[:, column],
+				                                                 index_of_slack)
+				grid_node_results_of_timestamps[timestamp] = node_results
+				grid_line_results_of_timestamps[timestamp] = line_results
+
+		return grid_node_results_of_timestamps, grid_line_results_of_timestamps
+
+	def __get_factorizations(self, pvpq_indices, pq_indices):
+		"""
+		returns the cached LU factorizations of B' and B'', computes them on the first
+		call per node type pattern
+		:return: tuple of the two splu objects
+		"""
+		cache_key = (tuple(pvpq_indices), tuple(pq_indices))
+		if cache_key not in self.__factorization_cache:
+			# B-Matrizen aus dem negativen Imaginaerteil der Knotenadmittanzmatrix bilden
+			B = -1 * self.bus_admittance_matrix.imag
+			Bp = B[pvpq_indices, :][:, pvpq_indices]
+			Bpp = B[pq_indices, :][:, pq_indices]
+			self.__factorization_cache[cache_key] = (factorize(Bp), factorize(Bpp))
+
+		return self.__factorization_cache[cache_key]
+
+	def do_iterations(self, v_magnitude, v_angle, p_spec, q_spec, pvpq_indices, pq_indices, splu_Bp, splu_Bpp):
+		"""
+		alternating half iterations of the fast decoupled scheme, each one is a single
+		back-substitution with the constant factorizations
+		:return: converged voltage magnitudes, voltage angles and the iteration count
+		"""
+		iteration = 0
+
+		while iteration < self.MAX_ITERATIONS:
+			# Leistungsmismatches am aktuellen Betriebspunkt
+			voltages = v_magnitude * np.exp(1j * v_angle)
+			power_injections = voltages * np.conj(self.bus_admittance_matrix.dot(voltages))
+			delta_p = (power_injections.real - p_spec)[pvpq_indices] / v_magnitude[pvpq_indices]
+			delta_q = (power_injections.imag - q_spec)[pq_indices] / v_magnitude[pq_indices]
+
+			if self.check_convergency(delta_p, delta_q):
+				break
+
+			# Winkelkorrektur (P-Theta Halbiteration)
+			v_angle[pvpq_indices] -= splu_Bp.solve(delta_p)
+
+			# Betragskorrektur (Q-U Halbiteration)
+			voltages = v_magnitude * np.exp(1j * v_angle)
+			power_injections = voltages * np.conj(self.bus_admittance_matrix.dot(voltages))
+			delta_q = (power_injections.imag - q_spec)[pq_indices] / v_magnitude[pq_indices]
+			v_magnitude[pq_indices] -= splu_Bpp.solve(delta_q)
+
+			iteration += 1
+
+		return v_magnitude, v_angle, iteration
+
+	def do_iterations_batch(self, v_magnitude, v_angle, p_spec, q_spec, pvpq_indices, pq_indices,
+	                        splu_Bp, splu_Bpp):
+		"""
+		batched variant of do_iterations: the voltage state is a (N, T) matrix, convergence
+		is tracked per column and already converged timestamps drop out of the active set
+		:return: converged voltage magnitudes, voltage angles and the iteration count
+		"""
+		iteration = 0
+		active_columns = np.arange(v_magnitude.shape[1])
+
+		while iteration < self.MAX_ITERATIONS and len(active_columns):
+			# Leistungsmismatches aller noch nicht konvergierten Zeitschritte auf einmal
+			voltages = (v_magnitude * np.exp(1j * v_angle))[:, active_columns]
+			power_injections = voltages * np.conj(self.bus_admittance_matrix.dot(voltages))
+			delta_p = (power_injections.real - p_spec[:, active_columns])[pvpq_indices] \
+				/ v_magnitude[np.ix_(pvpq_indices, active_columns)]
+			delta_q = (power_injections.imag - q_spec[:, active_columns])[pq_indices] \
+				/ v_magnitude[np.ix_(pq_indices, active_columns)]
+
+			# konvergierte Spalten aus dem aktiven Satz entfernen
+			largest_mismatches = np.maximum(np.max(np.absolute(delta_p), axis=0, initial=0),
+			                                np.max(np.absolute(delta_q), axis=0, initial=0))
+			not_converged = largest_mismatches >= self.CONVERGENCE_ACCURACY
+			active_columns = active_columns[not_converged]
+			if not len(active_columns):
+				break
+
+			# Winkelkorrektur (P-Theta Halbiteration) mit mehrspaltiger rechter Seite
+			v_angle[np.ix_(pvpq_indices, active_columns)] -= splu_Bp.solve(delta_p[:, not_converged])
+
+			# Betragskorrektur (Q-U Halbiteration)
+			voltages = (v_magnitude * np.exp(1j * v_angle))[:, active_columns]
+			power_injections = voltages * np.conj(self.bus_admittance_matrix.dot(voltages))
+			delta_q = (power_injections.imag - q_spec[:, active_columns])[pq_indices] \
+				/ v_magnitude[np.ix_(pq_indices, active_columns)]
+			v_magnitude[np.ix_(pq_indices, active_columns)] -= splu_Bpp.solve(delta_q)
+
+			iteration += 1
+
+		return v_magnitude, v_angle, iteration
+
+	def check_convergency(self, delta_p, delta_q):
+		largest_mismatch = max(np.max(np.absolute(delta_p), initial=0), np.max(np.absolute(delta_q), initial=0))
+		return True if largest_mismatch < self.CONVERGENCE_ACCURACY else False
+
+	def create_results(self, gridnodes, typenumbers, v_magnitude, v_angle, index_of_slack):
+		"""
+		creates the same result datastructures as the Newton-Raphson path
+		:return: grid node results and grid line results of the timestamp
+		"""
+		voltages = v_magnitude * np.exp(1j * v_angle)
+		power_injections = voltages * np.conj(self.bus_admittance_matrix.dot(voltages))
+
+		grid_node_results = dict()
+		for index, grid_node in enumerate(gridnodes):
+			grid_node_name = grid_node.name
+			node_type = grid_node.types_index[typenumbers[index]]
+			node_results = {"Nodetyp": node_type}
+
+			if node_type == "slack":
+				p_gross = power_injections.real[index]
+				q_gross = power_injections.imag[index]
+				p_load = grid_node.get_p_load()
+				q_load = grid_node.get_q_load()
+				node_results["p_load"] = p_load
+				node_results["p_gen"] = p_gross + p_load
+				node_results["p"] = p_gross
+				node_results["q_load"] = q_load
+				node_results["q_gen"] = q_gross + q_load
+				node_results["q"] = q_gross
+				node_results["v_magnitude"] = v_magnitude[index]
+				node_results["v_angle"] = v_angle[index] * (180 / math.pi)
+
+			elif node_type == "PQ":
+				p_load = grid_node.get_p_load()
+				q_load = grid_node.get_q_load()
+				node_results["p_load"] = p_load
+				node_results["p_gen"] = 0
+				node_results["p"] = - p_load
+				node_results["q_load"] = q_load
+				node_results["q_gen"] = 0
+				node_results["q"] = - q_load
+				node_results["v_magnitude"] = v_magnitude[index]
+				node_results["v_angle"] = v_angle[index] * (180 / math.pi)
+
+			elif node_type == "PV":
+				p_load = grid_node.get_p_load()
+				p_gen = grid_node.get_p_gen()
+				q_gross = power_injections.imag[index]
+				q_load = grid_node.get_q_load()
+				node_results["p_load"] = p_load
+				node_results["p_gen"] = p_gen
+				node_results["p"] = p_load + p_gen
+				node_results["q_load"] = q_load
+				node_results["q_gen"] = q_gross - q_load
+				node_results["q"] = q_gross
+				node_results["v_magnitude"] = v_magnitude[index]
+				node_results["v_angle"] = v_angle[index] * (180 / math.pi)
+
+			grid_node_results[grid_node_name] = node_results
+
+		return grid_node_results, self.create_line_results(gridnodes, voltages)
+
+	def create_line_results(self, gridnodes, voltages):
+		"""
+		creates the line value datastructures via the vectorized line flow equations
+		:return: grid line results of the timestamp
+		"""
+		if self.__line_arrays is None:
+			self.__line_arrays = create_line_arrays(gridnodes, self.grid_line_list)
+		line_indices_i, line_indices_j, line_admittances, line_transverse_admittances = self.__line_arrays
+
+		# Spannungsvektor im [Fk, Ek]-Format der Lastflussgleichungen
+		Fk_Ek_vector = np.concatenate((voltages.imag, voltages.real))
+
+		s_i_to_j, s_j_to_i, current_i_to_j, current_j_to_i = calculate_line_flows(
+			Fk_Ek_vector, line_indices_i, line_indices_j, line_admittances, line_transverse_admittances)
+
+		grid_line_results = dict()
+		for index, grid_line in enumerate(self.grid_line_list):
+			s_from_node_i_to_node_j = s_i_to_j[index]
+			s_from_node_j_to_node_i = s_j_to_i[index]
+			current_from_node_i_to_node_j = current_i_to_j[index]
+			current_from_node_j_to_node_i = current_j_to_i[index]
+
+			s_loss = s_from_node_i_to_node_j + s_from_node_j_to_node_i
+
+			line_results = dict()
+			line_results['bus_i'] = grid_line.get_node_name_i()
+			line_results['bus_j'] = grid_line.get_node_name_j()
+			line_results["s_from_i_to_j"] = round(float(np.absolute(s_from_node_i_to_node_j)), 6)
+			line_results["p_from_i_to_j"] = round(float(s_from_node_i_to_node_j.real), 6)
+			line_results["q_from_i_to_j"] = round(float(s_from_node_i_to_node_j.imag), 6)
+			line_results["s_from_j_to_i"] = round(float(np.absolute(s_from_node_j_to_node_i)), 6)
+			line_results["p_from_j_to_i"] = round(float(s_from_node_j_to_node_i.real), 6)
+			line_results["q_from_j_to_i"] = round(float(s_from_node_j_to_node_i.imag), 6)
+			line_results["p_loss"] = round(float(s_loss.real), 6)
+			line_results["q_loss"] = round(float(s_loss.imag), 6)
+			line_results["current_from_i_to_j"] = round(float(np.absolute(current_from_node_i_to_node_j)), 6)
+			line_results["current_from_j_to_i"] = round(float(np.absolute(current_from_node_j_to_node_i)), 6)
+
+			grid_line_results[grid_line.name] = line_results
+
+		return grid_line_results
@@ -1,6 +1,7 @@
 import numpy as np
 
 from pyspfc.utils.complexutils import get_cartesian_from_euler
+from .powerflowkernels import fill_jacobian_sub_matrices
 
 """
 Quelle:  E. Handschin, "Elektrische Energieübertragunssysteme",
@@ -36,38 +37,63 @@ Aufbau der Jacobimatrix J:
 class JacobianMatrix:
 	
 	def __init__(self, **kwargs):
-		
+
+		# Knotenadmittanzmatrix (zeitinvariant, wird ueber alle Betriebspunkte wiederverwendet)
+		self.__bus_admittance_matrix = kwargs['bus_admittance_matrix'] if 'bus_admittance_matrix' in kwargs else None
+
+		# dichte Real- und Imaginaerteile der Knotenadmittanzmatrix fuer den Befuellungs-Kernel,
+		# einmalig extrahiert da die Matrix zeitinvariant ist
+		dense_matrix = self.__bus_admittance_matrix.toarray() if hasattr(self.__bus_admittance_matrix, 'toarray') \
+			else np.asarray(self.__bus_admittance_matrix, dtype=complex)
+		self.__G = np.ascontiguousarray(dense_matrix.real)
+		self.__B = np.ascontiguousarray(dense_matrix.imag)
+
+		# vorallokierte Puffer der Jacobi-Teilmatrizen, werden von set_operating_point() wiederverwendet
+		self.__sub_matrix_buffers = None
+
+		self.set_operating_point(kwargs['gridnodes'] if 'gridnodes' in kwargs else None,
+		                         kwargs['voltagenodes'] if 'voltagenodes' in kwargs else None,
+		                         kwargs['Fk_Ek_vector'] if 'Fk_Ek_vector' in kwargs else None)
+
+	def set_operating_point(self, gridnodes, voltagenodes, Fk_Ek_vector=None):
+		"""
+		updates the Jacobian for a new operating point (timestamp or Newton-Raphson iterate)
+		while reusing the object and its preallocated sub-matrix buffers; the bus admittance
+		matrix and thus the sparsity structure stays untouched
+		:param gridnodes: list of grid nodes of the operating point
+		:param voltagenodes: list of voltage (PV) nodes of the operating point
+		:param Fk_Ek_vector: voltage vector to evaluate the Jacobian at, slack start values if None
+		:return: void
+		"""
+
 		# Liste der Netzknoten
-		self.__grid_node_list = kwargs['gridnodes'] if 'gridnodes' in kwargs else None
-		
+		self.__grid_node_list = gridnodes
+
 		# Anzahl an Netzknoten
 		self.__number_of_nodes = len(self.__grid_node_list)
-		
+
 		# Liste der Spannungsknoten
-		self.__list_of_voltage_nodes = kwargs['voltagenodes'] if 'voltagenodes' in kwargs else None
-		
+		self.__list_of_voltage_nodes = voltagenodes
+
 		# Anzahl der Spannungsknoten
 		self.__number_of_voltage_nodes = len(self.__list_of_voltage_nodes)
-		
-		# Knotenadmittanzmatrix
-		self.__bus_admittance_matrix = kwargs['bus_admittance_matrix'] if 'bus_admittance_matrix' in kwargs else None
-		
+
 		self.index_of_slack = next((index for index, grid_node in enumerate(self.__grid_node_list) if
 		                            grid_node.get_type_number() == self.__grid_node_list[
 			                            index].get_grid_node_type_index_of("slack")), None)
-		
-		self.Fk_Ek_vector = self.sub_Fk_Ek_vector = kwargs[
-			'Fk_Ek_vector'] if 'Fk_Ek_vector' in kwargs else self.init_Fk_Ek_vector()
-		
+
+		self.Fk_Ek_vector = self.sub_Fk_Ek_vector = Fk_Ek_vector if Fk_Ek_vector is not None \
+			else self.init_Fk_Ek_vector()
+
 		self.p_q_v_info_vector = self.create_p_q_v_info_vector()
-		
+
 		# wird bei der Erstellung der SubJacobi Jk geändert
 		self.sub_p_q_v_info_vector = self.p_q_v_info_vector
-		
-		# Jacobimatrix bei Initialiseirung mit Slack-Werten erstellen
+
+		# Jacobimatrix fuer den Betriebspunkt erstellen
 		self.J = self.create_jacobian(self.Fk_Ek_vector)
 		self.Jk = self.create_sub_jacobian_Jk(self.J)
-	
+
 	# getter und setter
 	def get_number_of_voltage_nodes(self):
 		return self.__number_of_voltage_nodes
@@ -164,68 +190,32 @@ class JacobianMatrix:
 	"""
 	
 	def create_jacobian_sub_matrices(self, Fk_Ek_vector):
-		
+
 		self.__has_voltage_nodes = True if self.__number_of_voltage_nodes > 1 else False
-		
+
 		# Initialisierung der Teilmatrizen
 		J1, J2, J3, J4, J5, J6 = self.__init_sub_matrices(self.__number_of_nodes, self.__number_of_voltage_nodes + 1)
-		
-		# Fuelle Jacobi-Teilmatrizen
-		for index, grid_node in enumerate(self.__grid_node_list):
-			
-			Fi = Fk_Ek_vector[index]
-			Ei = Fk_Ek_vector[index + self.__number_of_nodes]
-			
-			for j in range(self.__number_of_nodes):
-				
-				# Admittanz aus Knotenadmittanzmatrix speichern
-				Yij = self.__bus_admittance_matrix[index][j]
-				Gij = Yij.get_real_part()
-				Bij = Yij.get_imaginary_part()
-				
-				# Diagonalelemente von J1, J2, J3, J4, J5, und J6
-				if index == j:
-					dPi_dFj, dPi_dEj, dQi_dFj, dQi_dEj, dUi2_dFj, dUi2_dEj = self.__calculate_diag_elements(Ei, Fi, Gij,
-					                                                                                        Bij, index)
-				
-				# nicht Diagonalelemente von J1, J2, J3, J4, J5, und J6
-				else:
-					dPi_dFj, dPi_dEj, dQi_dFj, dQi_dEj, dUi2_dFj, dUi2_dEj = self.__calculate_not_diag_elements(Ei, Fi,
-					                                                                                            Gij,
-					                                                                                            Bij)
-				
-				# dim(J1, J2) = Anzahl der Knoten. Hier muss nicht auf den Wert der Laufvariablen index geachtet werden.
-				# Wirkleistungselemente
-				J1[index][j] = dPi_dFj
-				J2[index][j] = dPi_dEj
-				
-				# Blindleistungselemente
-				J3[index][j] = dQi_dFj
-				J4[index][j] = dQi_dEj
-				
-				# wenn es Spannungsknoten gibt gilt: dim(J1, J2) = dim(J3, J4) + dim(J5, J6)
-				if (J5 is not None) and (J6 is not None):
-					# if index < len(J3):
-					# 	J3[index][j] = dQi_dFj
-					# 	J4[index][j] = dQi_dEj
-					# if index < len(J5):
-					J5[index][j] = dUi2_dFj
-					J6[index][j] = dUi2_dEj
-		# else:
-		# 	J3[index][j] = dQi_dFj
-		# 	J4[index][j] = dQi_dEj
-		
+
+		# Jacobi-Teilmatrizen ueber den (ggf. Numba-kompilierten) Kernel befuellen
+		fill_jacobian_sub_matrices(np.asarray(Fk_Ek_vector, dtype=float), self.__G, self.__B,
+		                           J1, J2, J3, J4, J5, J6)
+
 		return J1, J2, J3, J4, J5, J6
 	
 	# Initialisierung der Jacobi-Teilmatrizen
 	def __init_sub_matrices(self, number_of_nodes, number_of_voltage_nodes):
-		
+
+		# vorallokierte Puffer wiederverwenden solange die Knotenanzahl unveraendert ist
+		if self.__sub_matrix_buffers is not None and \
+				self.__sub_matrix_buffers[0].shape == (number_of_nodes, number_of_nodes):
+			return self.__sub_matrix_buffers
+
 		# Erstellung der nxn-dimensionalen Numpy-Arrays
 		J1 = np.ndarray(shape=(number_of_nodes, number_of_nodes), dtype=float)
 		J2 = np.ndarray(shape=(number_of_nodes, number_of_nodes), dtype=float)
 		J3 = np.ndarray(shape=(number_of_nodes, number_of_nodes), dtype=float)
 		J4 = np.ndarray(shape=(number_of_nodes, number_of_nodes), dtype=float)
-		
+
 		# wenn Spannungsknoten existieren
 		if number_of_voltage_nodes:
 			# J5 = np.ndarray(shape=(number_of_voltage_nodes, number_of_nodes), dtype=float)
@@ -235,52 +225,11 @@ class JacobianMatrix:
 		else:
 			J5 = None
 			J6 = None
-		
+
+		self.__sub_matrix_buffers = (J1, J2, J3, J4, J5, J6)
+
 		return J1, J2, J3, J4, J5, J6
 	
-	"""
-		Berechnungsmethoden fuer die Elemente der Jacobi-Teilmatrizen J1, J2, J3, J4, J5 und J6
-	"""
-	
-	# -------------------------------------------------------------------------------------------------------------------
-	
-	# Diagonalelement berechnen
-	def __calculate_diag_elements(self, Ei, Fi, Gii, Bii, i):
-		
-		sum_part_dPi_dFi = sum_part_dPi_dEi = sum_part_dQi_dFi = sum_part_dQi_Ei = 0
-		
-		# an dieser Stelle wird fuer die Elemente i != j der Summenanteil berechnet
-		for j in range(self.__number_of_nodes):
-			if j != i:
-				Fj = self.Fk_Ek_vector[j]
-				Ej = self.Fk_Ek_vector[j + self.__number_of_nodes]
-				Gij = self.__bus_admittance_matrix[i][j].get_real_part()
-				Bij = self.__bus_admittance_matrix[i][j].get_imaginary_part()
-				
-				sum_part_dPi_dFi += (Fj * Gij + Ej * Bij)
-				sum_part_dPi_dEi += (Ej * Gij - Fj * Bij)
-				sum_part_dQi_dFi += (Ej * Gij - Fj * Bij)
-				sum_part_dQi_Ei += (Fj * Gij + Ej * Bij)
-		
-		dPi_dFi = (2 * Fi * Gii) + sum_part_dPi_dFi
-		dPi_dEi = (2 * Ei * Gii) + sum_part_dPi_dEi
-		dQi_dFi = -2 * Fi * Bii + sum_part_dQi_dFi
-		dQi_Ei = -2 * Ei * Bii - sum_part_dQi_Ei
-		dUi2_dFi = 2 * Fi
-		dUi2_dEi = 2 * Ei
-		
-		return dPi_dFi, dPi_dEi, dQi_dFi, dQi_Ei, dUi2_dFi, dUi2_dEi
-	
-	# "nicht"-Diagonalelemente berechnen
-	def __calculate_not_diag_elements(self, Ei, Fi, Gij, Bij):
-		dPi_dFj = ((-1 * Ei) * Bij) + (Fi * Gij)
-		dPi_dEj = (Ei * Gij) + (Fi * Bij)
-		dQi_dFj = ((-1 * Ei) * Gij) - (Fi * Bij)
-		dQi_Ej = ((-1 * Ei) * Bij) + (Fi * Gij)
-		dUi2_dFj = 0
-		dUi2_dEj = 0
-		return dPi_dFj, dPi_dEj, dQi_dFj, dQi_Ej, dUi2_dFj, dUi2_dEj
-	
 	# Jacobimatrix mit Teilmatrizen J1 - J6 fuellen
 	def create_jacobian(self, Fk_Ek_vector):
 		
@@ -322,6 +271,11 @@ class JacobianMatrix:
 					grid_node_type == "PQ" and value_type == "U"):
 				rows_to_delete.append(index)
 		
+		# Spaltenindizes auf die Breite der Jacobimatrix (2N: Fk- und Ek-Anteile) begrenzen,
+		# der Slack-Eintrag aus dem U-Abschnitt des Infovektors hat keine eigene Spalte
+		number_of_columns = jacobian_matrix.shape[1]
+		columns_to_delete = [column for column in columns_to_delete if column < number_of_columns]
+
 		# Zeilen und Spalten loeschen
 		self.sub_p_q_v_info_vector = np.delete(self.p_q_v_info_vector, rows_to_delete, 0)
 		Jk = np.delete(jacobian_matrix, rows_to_delete, 0)
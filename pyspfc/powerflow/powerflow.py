@@ -1,10 +1,26 @@
 import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import splu
 
 from pyspfc.gridelements.gridnode import GridNode
-from pyspfc.powerflow.jacobianmatrix import JacobianMatrix
 from pyspfc.utils.complexutils import get_polar
 from .powerflowequations import *
 
+# ab dieser Systemgroesse lohnt die COLAMD-Spaltenumordnung vor der LU-Zerlegung,
+# darunter dominiert der Ordnungsaufwand und die natuerliche Reihenfolge ist schneller
+COLAMD_MIN_SYSTEM_SIZE = 300
+
+
+def factorize(matrix):
+	"""
+	LU factorization with an explicit approximate minimum degree column ordering for
+	larger systems; small systems keep the natural ordering
+	:param matrix: square matrix to factorize
+	:return: scipy SuperLU object of the factorization
+	"""
+	permc_spec = 'COLAMD' if matrix.shape[0] >= COLAMD_MIN_SYSTEM_SIZE else 'NATURAL'
+	return splu(csc_matrix(matrix), permc_spec=permc_spec)
+
 
 class PowerFlow:
 	
@@ -15,7 +31,7 @@ class PowerFlow:
 		
 		# Liste der Leitungen
 		self.grid_line_list = kwargs['gridlines'] if 'gridlines' in kwargs else None
-		
+
 		# Liste der Transformatoren
 		self.transformers = kwargs['transformers'] if 'transformers' in kwargs else None
 		
@@ -33,21 +49,44 @@ class PowerFlow:
 		self.bus_admittance_matrix = kwargs['bus_admittance_matrix'] if 'bus_admittance_matrix' in kwargs else None
 		
 		self.jacobian_matrix = kwargs['jacobimatrix'] if 'jacobimatrix' in kwargs else None
+
+		# Rechengenauigkeit der LU-Zerlegung und Rueckwaertseinsetzung: 'fp64' (Standard) oder
+		# 'fp32', die Mismatch-Berechnung und die Konvergenzpruefung bleiben immer in FP64
+		self.precision = kwargs['precision'] if 'precision' in kwargs else 'fp64'
 		
 		self.powerflowequations = None
 		
 		self.sub_p_q_v_vector = None
 		
 		self.init_Fk_Ek_vector = self.jacobian_matrix.Fk_Ek_vector
-		
+
+		# SoA-Spalten der Leitungsliste fuer die vektorisierte Leistungsfluss-Berechnung,
+		# Knotenreihenfolge und Leitungsdaten sind zeitinvariant
+		self.__line_arrays = create_line_arrays(self.grid_node_list, self.grid_line_list)
+
 		self.nodes_that_exceeded_q_limit = set()
 		
 		self.grid_node_results = dict()
-		
+
 		self.grid_line_results = dict()
-		
+
 		self.export_result_df = None
-	
+
+	def set_operating_point(self, gridnodes):
+		"""
+		reuses the PowerFlow object for a new timestamp: only the time variant node data
+		changes, bus admittance matrix and Jacobian object stay the same
+		:param gridnodes: prepared grid node list of the new timestamp
+		:return: void
+		"""
+		self.grid_node_list = gridnodes
+		self.new_grid_node_list = copy.deepcopy(gridnodes)
+		self.initial_generator_node_names_and_indices = self.get_generator_node_names_and_index(gridnodes)
+		self.init_Fk_Ek_vector = self.jacobian_matrix.Fk_Ek_vector
+		self.nodes_that_exceeded_q_limit = set()
+		self.grid_node_results = dict()
+		self.grid_line_results = dict()
+
 	# Lastflussberechnung
 	def do_powerflow(self):
 		"""
@@ -73,61 +112,102 @@ class PowerFlow:
 		                                                                     sub_p_q_v_info_vector=sub_p_q_v_info_vector)
 		
 		p_q_v_vector = self.calculate_p_q_v_vector(p_q_v_info_vector, Fk_Ek_vector, initial=False)
-		
+
+		# konvergierten Spannungsvektor fuer den Warmstart des naechsten Zeitschritts merken
+		self.converged_Fk_Ek_vector = Fk_Ek_vector
+
 		return self.create_node_results(p_q_v_info_vector, p_q_v_vector, Fk_Ek_vector,
 		                                number_of_nodes), self.create_line_results(Fk_Ek_vector)
 	
 	# iterative Lastflussberechnung mit Newton-Raphson verfahren durchfuehren
 	def do_iterations(self, Fk_Ek_vector, sub_Fk_Ek_vector, sub_p_q_v_info_vector):
-		sub_jacobian_Jk = self.jacobian_matrix.Jk
-		inverse_sub_jacobian = np.linalg.inv(sub_jacobian_Jk)
-		
 		reached_convergence_limit = False
 		reached_max_iteration = False
 		iteration = 0
 		MAX_ITERATIONS = 20
 		self.CONVERGENCE_ACCURACY = 1e-6
-		
+
+		# Mismatch am Startpunkt pruefen: warm gestartete Zeitreihen liegen haeufig schon
+		# innerhalb der Konvergenzgrenze, dann entfallen Faktorisierung und Iterationen komplett
+		initial_p_q_v_vector = self.calculate_p_q_v_vector(sub_p_q_v_info_vector, Fk_Ek_vector, initial=False)
+		if self.check_convergency(self.sub_p_q_v_vector - initial_p_q_v_vector):
+			return Fk_Ek_vector, sub_Fk_Ek_vector, iteration
+
+		sub_jacobian_lu = self.factorize_sub_jacobian(self.jacobian_matrix.Jk)
+
 		while (not reached_convergence_limit) and (not reached_max_iteration):
-			Fk_Ek_vector, delta_p_q_v_vector, sub_p_q_v_iteration_vector = self.do_iteration(
-				inverse_sub_jacobian=inverse_sub_jacobian,
+			Fk_Ek_vector, delta_p_q_v_vector, delta_sub_Fk_Ek_vector = self.do_iteration(
+				sub_jacobian_lu=sub_jacobian_lu,
 				Fk_Ek_vector=Fk_Ek_vector,
 				sub_Fk_Ek_vector=sub_Fk_Ek_vector,
 				sub_p_q_v_info_vector=sub_p_q_v_info_vector)
-			
+
 			# Blindleistungsgrenzen der Einspeiseknoten pruefen und bei Verletzung die new_grid_node_list anpassen
 			self.new_grid_node_list = self.check_q_limits(Fk_Ek_vector)
-			
+
 			sub_Fk_Ek_vector = self.jacobian_matrix.get_sub_Fk_Ek_vector(Fk_Ek_vector)
-			
-			new_jacobi = JacobianMatrix(gridnodes=self.new_grid_node_list,
-			                            voltagenodes=self.get_voltage_nodes(self.new_grid_node_list),
-			                            bus_admittance_matrix=self.bus_admittance_matrix, Fk_Ek_vector=Fk_Ek_vector)
-			
-			new_sub_jacobian = new_jacobi.Jk
-			inverse_sub_jacobian = np.linalg.inv(new_sub_jacobian)
-			
+
 			iteration += 1
 			reached_max_iteration = True if iteration >= MAX_ITERATIONS else False
 			reached_convergence_limit = self.check_convergency(delta_p_q_v_vector)
-		
+
+			# linearer Betriebsbereich: liegt bereits die Schrittweite unter der Konvergenz-
+			# grenze, ist wegen der quadratischen Konvergenz des Newton-Verfahrens auch das
+			# naechste Residuum vernachlaessigbar und die erneute Auswertung entfaellt
+			if np.max(np.absolute(delta_sub_Fk_Ek_vector)) < self.CONVERGENCE_ACCURACY:
+				reached_convergence_limit = True
+
+			if reached_convergence_limit or reached_max_iteration:
+				break
+
+			# Jacobimatrix am neuen Betriebspunkt neu bewerten (numerischer Refactor),
+			# das Objekt und seine Puffer werden dabei wiederverwendet; nach der letzten
+			# Iteration wird bewusst nicht mehr faktorisiert
+			self.jacobian_matrix.set_operating_point(self.new_grid_node_list,
+			                                         self.get_voltage_nodes(self.new_grid_node_list),
+			                                         Fk_Ek_vector=Fk_Ek_vector)
+
+			sub_jacobian_lu = self.factorize_sub_jacobian(self.jacobian_matrix.Jk)
+
+		# falls die FP32-Rueckwaertseinsetzung die FP64-Konvergenzgrenze nicht erreicht hat,
+		# wird einmalig in FP64 nachiteriert
+		if self.precision == 'fp32' and reached_max_iteration and not reached_convergence_limit:
+			self.precision = 'fp64'
+			Fk_Ek_vector, sub_Fk_Ek_vector, fp64_iterations = self.do_iterations(Fk_Ek_vector, sub_Fk_Ek_vector,
+			                                                                     sub_p_q_v_info_vector)
+			self.precision = 'fp32'
+			iteration += fp64_iterations
+
 		return Fk_Ek_vector, sub_Fk_Ek_vector, iteration
-	
+
+	# LU-Zerlegung der Unter-Jacobimatrix, ersetzt die explizite Matrixinversion;
+	# bei precision='fp32' wird einfach genau faktorisiert, die Lastflusstoleranzen liegen
+	# deutlich ueber dem FP32-Epsilon und Newton-Raphson korrigiert Schrittfehler selbst
+	def factorize_sub_jacobian(self, sub_jacobian_Jk):
+		if self.precision == 'fp32':
+			sub_jacobian_Jk = np.asarray(sub_jacobian_Jk, dtype=np.float32)
+		return factorize(sub_jacobian_Jk)
+
 	# Berechnungen der Teilvektoren einer Iteration durchfuehren
-	def do_iteration(self, inverse_sub_jacobian, Fk_Ek_vector, sub_Fk_Ek_vector, sub_p_q_v_info_vector):
-		
+	def do_iteration(self, sub_jacobian_lu, Fk_Ek_vector, sub_Fk_Ek_vector, sub_p_q_v_info_vector):
+
 		sub_p_q_v_iteration_vector = self.calculate_p_q_v_vector(sub_p_q_v_info_vector, Fk_Ek_vector,
 		                                                         initial=False)
-		
+
 		delta_p_q_v_vector = self.sub_p_q_v_vector - sub_p_q_v_iteration_vector
-		delta_sub_Fk_Ek_vector = np.matmul(inverse_sub_jacobian, delta_p_q_v_vector)
+
+		# rechte Seite an den Datentyp der Faktorisierung anpassen, das Ergebnis wird beim
+		# Aufaddieren auf den FP64-Spannungsvektor wieder hochkonvertiert
+		right_hand_side = delta_p_q_v_vector.astype(np.float32) if self.precision == 'fp32' \
+			else delta_p_q_v_vector
+		delta_sub_Fk_Ek_vector = sub_jacobian_lu.solve(right_hand_side)
 		sub_Fk_Ek_iteration_vector = sub_Fk_Ek_vector + delta_sub_Fk_Ek_vector
 		
 		number_of_nodes_without_slack = len(self.grid_node_list) - 1
 		new_Fk_Ek_vector = self.create_new_Fk_Ek_vector(Fk_Ek_vector, sub_Fk_Ek_iteration_vector,
 		                                                number_of_nodes_without_slack)
-		
-		return new_Fk_Ek_vector, delta_p_q_v_vector, sub_p_q_v_iteration_vector
+
+		return new_Fk_Ek_vector, delta_p_q_v_vector, delta_sub_Fk_Ek_vector
 	
 	# Methode prueft ob die Blindleistungsgrenzen der Spannungsgeregelten Knoten in jeder Iteraion eingehalten werden.
 	# Falls nicht, wird aus einem PU-Knoten ein PQ- respektive Lastknoten
@@ -174,7 +254,7 @@ class PowerFlow:
 		return self.new_grid_node_list
 	
 	def check_convergency(self, delta_p_q_v_vector):
-		return True if max(delta_p_q_v_vector) < self.CONVERGENCE_ACCURACY else False
+		return True if np.max(np.absolute(delta_p_q_v_vector)) < self.CONVERGENCE_ACCURACY else False
 	
 	# Methode gibt den Index sowie den Knoten aus der uebergebenen Knotenliste zurueck
 	def get_index_and_grid_node_from_list(self, grid_node_name, grid_node_list):
@@ -255,27 +335,32 @@ class PowerFlow:
 		"""
 		creates bus value datastructures of the powerflow results
 		"""
+		# Ergebnis-Dictionaries mit allen Keys vorab anlegen, die Zuweisungen in der
+		# Schleife muessen die Dictionaries dann nicht mehr vergroessern
+		for grid_node in self.grid_node_list:
+			if grid_node.name not in self.grid_node_results:
+				self.grid_node_results[grid_node.name] = {
+					"Nodetyp": grid_node.types_index[grid_node.get_type_number()],
+					"p_load": None, "p_gen": None, "p": None,
+					"q_load": None, "q_gen": None, "q": None,
+					"v_magnitude": None, "v_angle": None}
+
 		for index, item in enumerate(p_q_v_info_vector):
-			
+
 			grid_node_name = item[0]
 			grid_node = [grid_node for grid_node in self.grid_node_list if grid_node.name == grid_node_name][0]
 			type_number = grid_node.get_type_number()
-			
+
 			# item[0] = Knotenname
 			# item[1] = Knotentyp
 			# item[2] = Knotenindex
 			# item[3] = Elektrische Groeße ("P", "Q" oder "U")
 			# item[4] = Wert der elektrischen Groeße
-			
+
 			value = p_q_v_vector[index]
 			if item[4] is None:
 				item[4] = value
-			
-			# Dictionary anlegen wenn Key nicht vorhanden
-			if not (grid_node_name in self.grid_node_results):
-				self.grid_node_results[grid_node_name] = {}
-				self.grid_node_results[grid_node_name]["Nodetyp"] = item[1]
-			
+
 			if grid_node.types_index[type_number] == "slack":
 				if item[3] == "P":
 					p_gross = item[4]
@@ -343,47 +428,39 @@ class PowerFlow:
 		"""
 		creates line value datastructures of the powerflow results
 		"""
-		for grid_line in self.grid_line_list:
+		# Leistungsfluesse und Stroeme aller Leitungen auf einmal ueber die SoA-Spalten berechnen
+		line_indices_i, line_indices_j, line_admittances, line_transverse_admittances = self.__line_arrays
+		s_i_to_j, s_j_to_i, current_i_to_j, current_j_to_i = calculate_line_flows(
+			np.asarray(Fk_Ek_vector, dtype=float), line_indices_i, line_indices_j, line_admittances,
+			line_transverse_admittances)
+
+		for index, grid_line in enumerate(self.grid_line_list):
 			grid_line_name = grid_line.name
-			
+
 			grid_node_name_i = grid_line.get_node_name_i()
 			grid_node_name_j = grid_line.get_node_name_j()
-			grid_node_index_i = self.get_index_of_node_from_grid_node_list(grid_node_name_i, self.grid_node_list)
-			grid_node_index_j = self.get_index_of_node_from_grid_node_list(grid_node_name_j, self.grid_node_list)
-			
-			s_from_node_i_to_node_j, current_from_node_i_to_node_j = self.powerflowequations.calculate_s_from_node_i_to_node_j(
-				grid_line, Fk_Ek_vector,
-				grid_node_index_i,
-				grid_node_index_j)
-			
-			s_from_node_j_to_node_i, current_from_node_j_to_node_i = self.powerflowequations.calculate_s_from_node_j_to_node_i(
-				grid_line, Fk_Ek_vector,
-				grid_node_index_i,
-				grid_node_index_j)
-			
+
+			s_from_node_i_to_node_j = s_i_to_j[index]
+			s_from_node_j_to_node_i = s_j_to_i[index]
+			current_from_node_i_to_node_j = current_i_to_j[index]
+			current_from_node_j_to_node_i = current_j_to_i[index]
+
 			s_loss = s_from_node_i_to_node_j + s_from_node_j_to_node_i
-			
-			if not (grid_line_name in self.grid_node_results):
-				self.grid_line_results[grid_line_name] = {}
-				self.grid_line_results[grid_line_name]['bus_i'] = grid_node_name_i
-				self.grid_line_results[grid_line_name]['bus_j'] = grid_node_name_j
-			
-			self.grid_line_results[grid_line_name]["s_from_i_to_j"] = round(float(np.absolute(s_from_node_i_to_node_j)),
-			                                                                6)
-			self.grid_line_results[grid_line_name]["p_from_i_to_j"] = round(float(s_from_node_i_to_node_j.real), 6)
-			self.grid_line_results[grid_line_name]["q_from_i_to_j"] = round(float(s_from_node_i_to_node_j.imag), 6)
-			self.grid_line_results[grid_line_name]["s_from_j_to_i"] = round(float(np.absolute(s_from_node_j_to_node_i)),
-			                                                                6)
-			self.grid_line_results[grid_line_name]["p_from_j_to_i"] = round(float(s_from_node_j_to_node_i.real), 6)
-			self.grid_line_results[grid_line_name]["q_from_j_to_i"] = round(float(s_from_node_j_to_node_i.imag), 6)
-			self.grid_line_results[grid_line_name]["p_loss"] = round(float(s_loss.real), 6)
-			self.grid_line_results[grid_line_name]["q_loss"] = round(float(s_loss.imag), 6)
-			self.grid_line_results[grid_line_name]["current_from_i_to_j"] = round(
-				float(np.absolute(current_from_node_i_to_node_j)),
-				6)
-			self.grid_line_results[grid_line_name]["current_from_j_to_i"] = round(
-				float(np.absolute(current_from_node_j_to_node_i)),
-				6)
+
+			# Ergebnis-Dictionary einer Leitung in einem Stueck mit allen Keys anlegen
+			self.grid_line_results[grid_line_name] = {
+				'bus_i': grid_node_name_i,
+				'bus_j': grid_node_name_j,
+				"s_from_i_to_j": round(float(np.absolute(s_from_node_i_to_node_j)), 6),
+				"p_from_i_to_j": round(float(s_from_node_i_to_node_j.real), 6),
+				"q_from_i_to_j": round(float(s_from_node_i_to_node_j.imag), 6),
+				"s_from_j_to_i": round(float(np.absolute(s_from_node_j_to_node_i)), 6),
+				"p_from_j_to_i": round(float(s_from_node_j_to_node_i.real), 6),
+				"q_from_j_to_i": round(float(s_from_node_j_to_node_i.imag), 6),
+				"p_loss": round(float(s_loss.real), 6),
+				"q_loss": round(float(s_loss.imag), 6),
+				"current_from_i_to_j": round(float(np.absolute(current_from_node_i_to_node_j)), 6),
+				"current_from_j_to_i": round(float(np.absolute(current_from_node_j_to_node_i)), 6)}
 		
 		return self.grid_line_results
 	
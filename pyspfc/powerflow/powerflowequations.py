@@ -1,5 +1,9 @@
 import copy
 
+import numpy as np
+
+from .powerflowkernels import calculate_node_power
+
 """
 	source:  E. Handschin, "Elektrische Energieübertragunssysteme",
 			 Teil 1: Stationärer Betriebszustand
@@ -28,14 +32,70 @@ import copy
 	"""
 
 
+def calculate_line_flows(Fk_Ek_vector, line_indices_i, line_indices_j, line_admittances,
+                         line_transverse_admittances):
+	"""
+	vectorized apparent power flows and currents over all grid lines at once, the line
+	data is passed as structure-of-arrays columns
+
+	Sij = Ui* x (Ui - Uj) x Yij + |Ui|^2 x Y0i
+
+	:param Fk_Ek_vector: voltage vector [Fk, Ek]
+	:param line_indices_i: node indices of the line start nodes
+	:param line_indices_j: node indices of the line end nodes
+	:param line_admittances: complex series admittances of the lines
+	:param line_transverse_admittances: complex transverse admittances on one node
+	:return: tuple of arrays (Sij, Sji, Iij, Iji) over all lines
+	"""
+	number_of_nodes = len(Fk_Ek_vector) // 2
+	voltages = Fk_Ek_vector[number_of_nodes:] + 1j * Fk_Ek_vector[:number_of_nodes]
+
+	Ui = voltages[line_indices_i]
+	Uj = voltages[line_indices_j]
+
+	Sij = np.conj(Ui) * (Ui - Uj) * line_admittances + (np.absolute(Ui) ** 2) * line_transverse_admittances
+	Sji = np.conj(Uj) * (Uj - Ui) * line_admittances + (np.absolute(Uj) ** 2) * line_transverse_admittances
+
+	Iij = np.conj(Sij) / np.conj(Ui)
+	Iji = np.conj(Sji) / np.conj(Uj)
+
+	return Sij, Sji, Iij, Iji
+
+
+def create_line_arrays(grid_node_list, grid_line_list):
+	"""
+	builds structure-of-arrays columns (node indices and complex admittances) of the
+	grid line list for the vectorized line flow calculation
+	:return: tuple of arrays (indices i, indices j, series admittances, transverse admittances)
+	"""
+	node_indices = {grid_node.name: index for index, grid_node in enumerate(grid_node_list)}
+
+	line_indices_i = np.array([node_indices[grid_line.get_node_name_i()] for grid_line in grid_line_list],
+	                          dtype=int)
+	line_indices_j = np.array([node_indices[grid_line.get_node_name_j()] for grid_line in grid_line_list],
+	                          dtype=int)
+	line_admittances = np.array([grid_line.get_admittance().value for grid_line in grid_line_list],
+	                            dtype=complex)
+	line_transverse_admittances = np.array([grid_line.get_transverse_admittance_on_node().value
+	                                        for grid_line in grid_line_list], dtype=complex)
+
+	return line_indices_i, line_indices_j, line_admittances, line_transverse_admittances
+
+
 class LoadFlowEquations:
 	def __init__(self, grid_node_list, bus_admittance_matrix):
 		
 		self.__grid_node_list = copy.deepcopy(grid_node_list)
 		
 		self.number_of_nodes = len(grid_node_list)
-		
+
 		self.__bus_admittance_matrix = bus_admittance_matrix
+
+		# dichte Real- und Imaginaerteile der Knotenadmittanzmatrix fuer die numerischen Kernel
+		dense_matrix = bus_admittance_matrix.toarray() if hasattr(bus_admittance_matrix, 'toarray') \
+			else np.asarray(bus_admittance_matrix, dtype=complex)
+		self.__G = np.ascontiguousarray(dense_matrix.real)
+		self.__B = np.ascontiguousarray(dense_matrix.imag)
 	
 	def calculate_active_power_at_node(self, Fk_Ek_vector, grid_node_index):
 		"""
@@ -45,31 +105,11 @@ class LoadFlowEquations:
 		:param grid_node_index:
 		:return:
 		"""
-		Ei = Fk_Ek_vector[self.number_of_nodes + grid_node_index]
-		Fi = Fk_Ek_vector[grid_node_index]
-		Pi = 0
-		for j in range(self.number_of_nodes):
-			Ej = Fk_Ek_vector[self.number_of_nodes + j]
-			Fj = Fk_Ek_vector[j]
-			Yij = self.__bus_admittance_matrix[grid_node_index][j]
-			Gij = Yij.get_real_part()
-			Bij = Yij.get_imaginary_part()
-			
-			Pi += (Ei * ((Ej * Gij) - (Fj * Bij))) + (Fi * ((Fj * Gij) + (Ej * Bij)))
+		Pi, Qi = calculate_node_power(np.asarray(Fk_Ek_vector, dtype=float), self.__G, self.__B, grid_node_index)
 		return Pi
-	
+
 	def calculate_reactive_power_at_node(self, Fk_Ek_vector, grid_node_index):
-		Ei = Fk_Ek_vector[self.number_of_nodes + grid_node_index]
-		Fi = Fk_Ek_vector[grid_node_index]
-		Qi = 0
-		for j in range(self.number_of_nodes):
-			Ej = Fk_Ek_vector[self.number_of_nodes + j]
-			Fj = Fk_Ek_vector[j]
-			Yij = self.__bus_admittance_matrix[grid_node_index][j]
-			Gij = Yij.get_real_part()
-			Bij = Yij.get_imaginary_part()
-			
-			Qi += (Fi * ((Ej * Gij) - (Fj * Bij))) - (Ei * ((Fj * Gij) + (Ej * Bij)))
+		Pi, Qi = calculate_node_power(np.asarray(Fk_Ek_vector, dtype=float), self.__G, self.__B, grid_node_index)
 		return Qi
 	
 	# Knotenspannung berechnen
@@ -0,0 +1,113 @@
+"""
+Numerische Kernel der Newton-Raphson-Iteration (Leistungsmismatch und Jacobi-Befuellung).
+
+Die Funktionen sind als reine Schleifen ueber dichte float-Arrays formuliert, damit sie
+von Numba im nopython-Modus kompiliert werden koennen. Numba ist eine optionale
+Abhaengigkeit - ist es nicht installiert, laufen die Kernel als normale Python-Funktionen
+mit identischen Ergebnissen.
+"""
+
+try:
+	from numba import njit
+
+	NUMBA_AVAILABLE = True
+except ImportError:
+	NUMBA_AVAILABLE = False
+
+	def njit(*args, **kwargs):
+		"""replacement decorator that leaves the function uncompiled"""
+		if len(args) == 1 and callable(args[0]):
+			return args[0]
+
+		def decorator(function):
+			return function
+
+		return decorator
+
+
+@njit(cache=True)
+def calculate_node_power(Fk_Ek_vector, G, B, grid_node_index):
+	"""
+	calculates active and reactive power injection at a single grid node
+
+	Pi = sum(Ei * (Ej * Gij - Fj * Bij) + Fi * (Fj * Gij + Ej * Bij))
+	Qi = sum(Fi * (Ej * Gij - Fj * Bij) - Ei * (Fj * Gij + Ej * Bij))
+
+	:param Fk_Ek_vector: voltage vector [Fk, Ek]
+	:param G: dense real part of the bus admittance matrix
+	:param B: dense imaginary part of the bus admittance matrix
+	:param grid_node_index: index of the grid node
+	:return: tuple (Pi, Qi)
+	"""
+	number_of_nodes = G.shape[0]
+	Ei = Fk_Ek_vector[number_of_nodes + grid_node_index]
+	Fi = Fk_Ek_vector[grid_node_index]
+
+	Pi = 0.0
+	Qi = 0.0
+	for j in range(number_of_nodes):
+		Ej = Fk_Ek_vector[number_of_nodes + j]
+		Fj = Fk_Ek_vector[j]
+		Gij = G[grid_node_index, j]
+		Bij = B[grid_node_index, j]
+
+		Pi += (Ei * ((Ej * Gij) - (Fj * Bij))) + (Fi * ((Fj * Gij) + (Ej * Bij)))
+		Qi += (Fi * ((Ej * Gij) - (Fj * Bij))) - (Ei * ((Fj * Gij) + (Ej * Bij)))
+
+	return Pi, Qi
+
+
+@njit(cache=True)
+def fill_jacobian_sub_matrices(Fk_Ek_vector, G, B, J1, J2, J3, J4, J5, J6):
+	"""
+	fills the six Jacobian sub matrices in place for the given voltage vector,
+	see JacobianMatrix for the derivative formulas
+
+	:param Fk_Ek_vector: voltage vector [Fk, Ek]
+	:param G: dense real part of the bus admittance matrix
+	:param B: dense imaginary part of the bus admittance matrix
+	:param J1..J6: preallocated (n, n) float matrices
+	:return: void, the sub matrices are modified in place
+	"""
+	number_of_nodes = G.shape[0]
+
+	for i in range(number_of_nodes):
+		Fi = Fk_Ek_vector[i]
+		Ei = Fk_Ek_vector[i + number_of_nodes]
+
+		sum_part_dPi_dFi = 0.0
+		sum_part_dPi_dEi = 0.0
+		sum_part_dQi_dFi = 0.0
+		sum_part_dQi_dEi = 0.0
+
+		# Nicht-Diagonalelemente, deren Summenanteile gehen in die Diagonalelemente ein
+		for j in range(number_of_nodes):
+			if j == i:
+				continue
+
+			Fj = Fk_Ek_vector[j]
+			Ej = Fk_Ek_vector[j + number_of_nodes]
+			Gij = G[i, j]
+			Bij = B[i, j]
+
+			sum_part_dPi_dFi += (Fj * Gij + Ej * Bij)
+			sum_part_dPi_dEi += (Ej * Gij - Fj * Bij)
+			sum_part_dQi_dFi += (Ej * Gij - Fj * Bij)
+			sum_part_dQi_dEi += (Fj * Gij + Ej * Bij)
+
+			J1[i, j] = ((-1 * Ei) * Bij) + (Fi * Gij)
+			J2[i, j] = (Ei * Gij) + (Fi * Bij)
+			J3[i, j] = ((-1 * Ei) * Gij) - (Fi * Bij)
+			J4[i, j] = ((-1 * Ei) * Bij) + (Fi * Gij)
+			J5[i, j] = 0.0
+			J6[i, j] = 0.0
+
+		# Diagonalelemente
+		Gii = G[i, i]
+		Bii = B[i, i]
+		J1[i, i] = (2 * Fi * Gii) + sum_part_dPi_dFi
+		J2[i, i] = (2 * Ei * Gii) + sum_part_dPi_dEi
+		J3[i, i] = -2 * Fi * Bii + sum_part_dQi_dFi
+		J4[i, i] = -2 * Ei * Bii - sum_part_dQi_dEi
+		J5[i, i] = 2 * Fi
+		J6[i, i] = 2 * Ei
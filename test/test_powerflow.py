@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from pyspfc.grid import Grid
+
+SERIES_FILES = ['generators_p_series.csv', 'generators_q_series.csv',
+                'loads_p_series.csv', 'loads_q_series.csv']
+
+# Zeitschritte und Skalierungsfaktoren der synthetischen Zeitreihe; die Spruenge nach
+# oben und unten erzeugen am Warmstartpunkt Mismatches beider Vorzeichen
+TIME_STAMPS = ['00:15', '00:30', '00:45', '01:00']
+SCALING_FACTORS = [1.0, 1.2, 0.8, 1.1]
+
+
+class TestPowerflow(TestCase):
+	"""
+	regression test for the Newton-Raphson time-series sweep: the warm started serial
+	sweep has to reproduce the cold started solution of every single timestamp
+	"""
+
+	def setUp(self):
+		self.import_path = tempfile.mkdtemp()
+		source_path = os.path.join(os.path.dirname(__file__), '..', 'csv_import')
+		for file_name in os.listdir(source_path):
+			source_file = os.path.join(source_path, file_name)
+			if os.path.isfile(source_file):
+				shutil.copy(source_file, self.import_path)
+		for file_name in SERIES_FILES:
+			self.create_series_file(os.path.join(self.import_path, file_name))
+
+	def tearDown(self):
+		shutil.rmtree(self.import_path)
+
+	def create_series_file(self, file_path):
+		with open(file_path) as series_file:
+			lines = series_file.read().strip().splitlines()
+		header = lines[0].strip()
+		first_row_values = lines[1].strip().split(';')[1:]
+
+		rows = [header]
+		for time_stamp, factor in zip(TIME_STAMPS, SCALING_FACTORS):
+			values = [str(float(value) * factor) if value else value for value in first_row_values]
+			rows.append(';'.join([time_stamp] + values))
+
+		with open(file_path, 'w') as series_file:
+			series_file.write('\n'.join(rows) + '\n')
+
+	def test_warm_start_matches_cold_start(self):
+		warm_grid = Grid()
+		warm_grid.import_csv_data(root_path=self.import_path)
+		warm_grid.do_powerflow()
+
+		for time_stamp in TIME_STAMPS:
+			cold_grid = Grid()
+			cold_grid.import_csv_data(root_path=self.import_path)
+			cold_grid.timestamps = [time_stamp]
+			cold_grid.do_powerflow()
+
+			warm_results = warm_grid.gridnode_results[time_stamp]
+			for grid_node_name, node_results in cold_grid.gridnode_results[time_stamp].items():
+				for key, cold_value in node_results.items():
+					if isinstance(cold_value, float):
+						self.assertAlmostEqual(cold_value, warm_results[grid_node_name][key], places=5,
+						                       msg='{} {} {}'.format(time_stamp, grid_node_name, key))